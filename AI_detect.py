@@ -3,86 +3,177 @@
 """
 A script to analyze documents for AI authorship likelihood using OpenAI.
 Supports PDF, DOCX, Markdown, and TXT files.
+
+Files are processed concurrently (--workers): each worker extracts a file's
+text and sends it for detection, so extraction of one file overlaps the API
+calls of the others. All calls share one keep-alive session with a
+connection pool sized to the worker count. Results keep the input order.
+The API endpoint can be pointed at a local stub server with --api-url (see
+detector_stub_server.py).
+
+Large PDFs are extracted in parallel by a process pool (--extract-workers)
+and DOCX files are parsed as a stream rather than as a whole document tree;
+see text_extraction.py.
+
+Results are cached on disk by a hash of the request (text, model and
+parameters), and extracted text by file path, modification time and size
+(see result_cache.py), so unchanged and duplicate documents are neither
+parsed nor sent again. Use --no-cache to always extract and call the API.
+
+With --chunk-size, long documents are scored as windows of that many words,
+concurrently, and combined into one verdict (see chunked_scoring.py).
+
+Inputs may be files, directories (searched recursively) or glob patterns,
+or listed one per line in a file (--files-from). With --ndjson, each file's
+result is written as one JSON line as soon as it completes; with --output
+and --resume, files already in the output file are skipped and new results
+appended, so an interrupted run can pick up where it stopped.
+
+With --serve PORT, the script instead runs as a long-lived local HTTP
+service that keeps sessions, caches, pools and extractors warm and accepts
+jobs (see detector_service.py). Format libraries are imported only when a
+file of that type is read.
+
+API calls are paced to --rpm requests and --tpm tokens per minute, with the
+number in flight adapting to throttling; 429s, 5xx responses and connection
+errors are retried with backoff, honoring Retry-After (see api_scheduler.py).
 """
 import os
 import sys
-import math
 import argparse
 import json
+import contextlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-# (Optional) from dotenv import load_dotenv
-try:
-    from dotenv import load_dotenv
-except ImportError:
-    def load_dotenv():
-        pass
+import text_extraction
+from api_scheduler import RequestScheduler, DEFAULT_MAX_RETRIES
+from chunked_scoring import Chunking, COMBINE_MODES
+from detection import DEFAULT_API_URL, DEFAULT_WORKERS, DEFAULT_CHUNK_WORKERS, make_session, analyze_file, iter_inputs
+from result_cache import ResultCache, TextCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB
 
-# Ensure 'requests' is available
-try:
-    import requests
-except ImportError:
-    print("Error: 'requests' library not installed. Install with 'pip install requests'.", file=sys.stderr)
-    sys.exit(1)
 
-from docx import Document
-import PyPDF2
+def iter_results(paths, api_key: str, workers: int = DEFAULT_WORKERS, api_url: str = DEFAULT_API_URL,
+                 cache: ResultCache = None, text_cache: TextCache = None,
+                 chunking: Chunking = None, chunk_workers: int = DEFAULT_CHUNK_WORKERS,
+                 scheduler: RequestScheduler = None):
+    """
+    Analyze files concurrently, yielding (input position, path, result, error)
+    for each file as soon as it completes; `error` is the exception of a file
+    that failed (and `result` None). Missing files are reported on stderr and
+    skipped. Only a few files per worker are in flight at a time, so `paths`
+    can be a long lazy iterable. API calls go through `scheduler` (default:
+    retries only, no rate limit).
+    """
+    # Windows are scored on their own pool: file workers wait on them, so
+    # sharing one pool could leave no thread free to score
+    window_workers = max(1, chunk_workers) if chunking else 0
+    window_pool = ThreadPoolExecutor(max_workers=window_workers) if chunking else None
+    if scheduler is None:
+        scheduler = RequestScheduler(max_concurrency=workers + window_workers)
+    max_in_flight = 2 * max(1, workers)
+    inputs = enumerate(paths)
+    in_flight = {}
+    try:
+        with make_session(api_key, pool_size=workers + window_workers) as session, \
+                ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    item = next(inputs, None)
+                    if item is None:
+                        exhausted = True
+                    elif not os.path.isfile(item[1]):
+                        print(f"Warning: File not found: {item[1]}", file=sys.stderr)
+                    else:
+                        future = pool.submit(analyze_file, item[1], api_key, session, api_url, cache, text_cache,
+                                             chunking, window_pool, scheduler)
+                        in_flight[future] = item
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, path = in_flight.pop(future)
+                    try:
+                        yield i, path, future.result(), None
+                    except Exception as e:
+                        yield i, path, None, e
+    finally:
+        # When stopped early, files not started yet are dropped
+        for future in in_flight:
+            future.cancel()
+        if window_pool is not None:
+            window_pool.shutdown()
 
 
-def extract_text(path: str) -> str:
+def analyze_files(paths, api_key: str, workers: int = DEFAULT_WORKERS, api_url: str = DEFAULT_API_URL,
+                  cache: ResultCache = None, text_cache: TextCache = None,
+                  chunking: Chunking = None, chunk_workers: int = DEFAULT_CHUNK_WORKERS,
+                  scheduler: RequestScheduler = None) -> list:
     """
-    Extract text from PDF, DOCX, MD, or TXT files.
+    Analyze files concurrently; returns the results in input order, skipping
+    missing files and files that failed (both reported on stderr).
     """
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".pdf":
-        text_chunks = []
-        with open(path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text_chunks.append(page_text)
-        return "\n".join(text_chunks)
+    results = {}
+    for i, path, result, error in iter_results(paths, api_key, workers, api_url, cache, text_cache,
+                                               chunking, chunk_workers, scheduler):
+        if error is not None:
+            print(f"Error processing {path}: {error}", file=sys.stderr)
+        else:
+            results[i] = result
+    return [results[i] for i in sorted(results)]
 
-    elif ext == ".docx":
-        doc = Document(path)
-        return "\n".join([p.text for p in doc.paragraphs])
 
-    elif ext in (".md", ".markdown", ".txt"):
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
+def resume_output(path: str) -> set:
+    """
+    Absolute paths of the files with a result in an existing NDJSON output
+    file (lines with an "error" are retried). A line cut short by an
+    interrupted run is removed so appended results start on a new line.
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+    for line in data[:complete].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "path" in record and "error" not in record:
+            done.add(record["path"])
+    return done
 
 
-def detect_ai(text: str, api_key: str) -> dict:
+def write_ndjson(out, paths, api_key: str, **kwargs) -> dict:
     """
-    Send text to OpenAI detection model and return verdict and confidence.
+    Analyze files, writing one JSON line per file to `out` as soon as it
+    completes: the result plus its absolute "path", or the "error" of a
+    file that failed. Returns counts of the files written and failed.
     """
-    url = "https://api.openai.com/v1/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": "model-detect-v2",
-        "prompt": text.strip() + "\n</s><|disc_score|>",
-        "max_tokens": 1,
-        "temperature": 0,
-        "logprobs": 5,
-        "stop": ["\n"],
-    }
-    resp = requests.post(url, headers=headers, json=payload)
-    resp.raise_for_status()
-    data = resp.json()
-    top_logprob = data["choices"][0]["logprobs"]["top_logprobs"][0].get("</s>", 0)
-    prob = math.exp(top_logprob)
-    confidence = 100 * (1 - prob)
-    verdict = "likely AI-generated" if confidence > 50 else "unlikely AI-generated"
-    return {"verdict": verdict, "confidence": round(confidence, 2)}
+    counts = {"written": 0, "failed": 0}
+    for _, path, result, error in iter_results(paths, api_key, **kwargs):
+        if error is not None:
+            print(f"Error processing {path}: {error}", file=sys.stderr)
+            record = {"file": os.path.basename(path), "path": os.path.abspath(path), "error": str(error)}
+            counts["failed"] += 1
+        else:
+            record = {"file": result["file"], "path": os.path.abspath(path), **result}
+            counts["written"] += 1
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+    return counts
 
 
 def main():
-    load_dotenv()
+    # (Optional) .env support
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("Error: OPENAI_API_KEY environment variable is missing.", file=sys.stderr)
@@ -93,25 +184,198 @@ def main():
     )
     parser.add_argument(
         "files",
-        nargs='+',
-        help="Paths to one or more PDF, DOCX, MD, or TXT files."
+        nargs='*',
+        help="PDF, DOCX, MD, or TXT files, directories to search, or glob patterns (e.g. 'notes/**/*.pdf')."
+    )
+    parser.add_argument(
+        "--files-from",
+        help="File listing one input path per line ('-' for stdin)."
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Write each file's result as one JSON line as soon as it completes."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help="Write the output to this file instead of stdout."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="With --ndjson and --output, skip files already in the output file and append new results."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of files processed concurrently (1 processes them one at a time)."
+    )
+    parser.add_argument(
+        "--api-url",
+        default=os.getenv("AI_DETECT_API_URL", DEFAULT_API_URL),
+        help="Completions endpoint (e.g. a local stub server for testing)."
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to extract large PDFs in parallel."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=0,
+        help="Score long documents in windows of this many words (0 scores the whole text at once)."
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=0,
+        help="Words shared by consecutive windows."
+    )
+    parser.add_argument(
+        "--chunk-combine",
+        choices=COMBINE_MODES,
+        default="mean",
+        help="Combine window scores by their mean or their maximum."
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=int,
+        default=DEFAULT_CHUNK_WORKERS,
+        help="Number of windows scored concurrently."
+    )
+    parser.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Stop scoring a document's windows once its verdict cannot change."
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Most API requests per minute (default: unlimited)."
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Most prompt tokens per minute, estimated from text length (default: unlimited)."
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Most API calls in flight; lowered on 429s and raised again as calls succeed "
+             "(default: --workers, plus --chunk-workers when chunking)."
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries of a throttled or failed API call before giving up."
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="Run as a warm service accepting jobs over HTTP on this port instead of analyzing files."
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Interface the service listens on."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached results."
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=os.getenv("AI_DETECT_CACHE", DEFAULT_CACHE_PATH),
+        help="Path of the SQLite result cache."
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE_DAYS,
+        help="Evict cached results unused for this many days."
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help="Evict least recently used results beyond this cache size in MB."
     )
     args = parser.parse_args()
+    if not args.files and not args.files_from and args.serve is None:
+        parser.error("no input files (give paths, directories, patterns or --files-from)")
+    if args.resume and not (args.ndjson and args.output):
+        parser.error("--resume requires --ndjson and --output")
+    text_extraction.set_workers(args.extract_workers)
+    chunking = None
+    if args.chunk_size:
+        if not 0 <= args.chunk_overlap < args.chunk_size:
+            parser.error("--chunk-overlap must be at least 0 and smaller than --chunk-size")
+        chunking = Chunking(args.chunk_size, args.chunk_overlap, args.chunk_combine, args.early_exit)
+    max_concurrency = args.max_concurrency or args.workers + (args.chunk_workers if chunking else 0)
+    scheduler = RequestScheduler(args.rpm, args.tpm, max(1, max_concurrency), max_retries=max(0, args.max_retries))
 
-    results = []
-    for path in args.files:
-        if not os.path.isfile(path):
-            print(f"Warning: File not found: {path}", file=sys.stderr)
-            continue
-        try:
-            text = extract_text(path)
-            result = detect_ai(text, api_key)
-            results.append({"file": os.path.basename(path), **result})
-        except Exception as e:
-            print(f"Error processing {path}: {e}", file=sys.stderr)
+    paths = iter_inputs(args.files, args.files_from)
+    skipped = 0
+    if args.resume:
+        done = resume_output(args.output)
+
+        def not_done(path):
+            nonlocal skipped
+            if os.path.abspath(path) in done:
+                skipped += 1
+                return False
+            return True
+
+        paths = filter(not_done, paths)
 
-    print(json.dumps({"analysis": results}, indent=2))
+    with contextlib.ExitStack() as stack:
+        cache = text_cache = None
+        if not args.no_cache:
+            cache = stack.enter_context(ResultCache(args.cache_path))
+            text_cache = stack.enter_context(TextCache(args.cache_path))
+            cache.prune(args.cache_max_age, args.cache_max_mb)
+            text_cache.prune(args.cache_max_age, args.cache_max_mb)
+        if args.serve is not None:
+            import detector_service
+            service = detector_service.DetectorService(api_key, args.workers, args.api_url, cache, text_cache,
+                                                       chunking, args.chunk_workers, scheduler,
+                                                       args.cache_max_age, args.cache_max_mb)
+            detector_service.serve(service, args.host, args.serve)
+            return
+        out = sys.stdout
+        if args.output:
+            out = stack.enter_context(open(args.output, "a" if args.resume else "w", encoding="utf-8"))
+        run = dict(workers=args.workers, api_url=args.api_url, cache=cache, text_cache=text_cache,
+                   chunking=chunking, chunk_workers=args.chunk_workers, scheduler=scheduler)
 
+        if args.ndjson:
+            # Results go out line by line; the run summary goes to stderr
+            try:
+                summary = write_ndjson(out, paths, api_key, **run)
+            except KeyboardInterrupt:
+                hint = " Rerun with --resume to continue." if args.output else ""
+                print(f"Interrupted.{hint}", file=sys.stderr)
+                sys.exit(130)
+            if args.resume:
+                summary["skipped"] = skipped
+        else:
+            summary = {"analysis": analyze_files(paths, api_key, **run)}
+        if cache is not None:
+            summary["cache"] = {**cache.stats(), "extraction": text_cache.stats()}
+        summary["requests"] = scheduler.stats()
+        if args.ndjson:
+            print(json.dumps(summary), file=sys.stderr)
+        else:
+            out.write(json.dumps(summary, indent=2) + "\n")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+"""
+Composer demographic aggregation for the dashboard.
+
+Composer Category codes: 1 White Men, 2 White Women, 3 BBIA Men, 4 BBIA Women
+(any other or missing code counts as NB). Composer Status codes: 1 Living,
+2 Deceased. Every breakdown the dashboard shows is derived from a single
+category x status contingency table, built with one bincount over the
+filtered rows.
+
+When a selection only involves Academic Year, Semester and Performance Type,
+the same summary is answered from a DemographicCube built once per dataset
+load, by adding up pre-aggregated cells instead of scanning rows.
+"""
+import numpy as np
+import pandas as pd
+
+from identity import PERFORMER_ID, WORK_ID
+
+
+GROUP_CODES = {'White Men': 1, 'White Women': 2, 'BBIA Men': 3, 'BBIA Women': 4}
+STATUS_CODES = {'Living': 1, 'Deceased': 2}
+
+
+def _codes(series, n_codes: int) -> np.ndarray:
+    """
+    Integer codes with missing or out-of-range values mapped to 0.
+    """
+    codes = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=0).astype(np.int64)
+    return np.where((codes >= 1) & (codes <= n_codes), codes, 0)
+
+
+N_CATEGORY = len(GROUP_CODES) + 1
+N_STATUS = len(STATUS_CODES) + 1
+
+
+def _demographic_codes(df: pd.DataFrame, col_category, col_status) -> np.ndarray:
+    """
+    Combined category x status cell (0 .. N_CATEGORY * N_STATUS - 1) of each row.
+    """
+    cat = _codes(df[col_category], N_CATEGORY - 1) if col_category else np.zeros(len(df), dtype=np.int64)
+    stat = _codes(df[col_status], N_STATUS - 1) if col_status else np.zeros(len(df), dtype=np.int64)
+    return cat * N_STATUS + stat
+
+
+def contingency_table(df: pd.DataFrame, col_category, col_status) -> np.ndarray:
+    """
+    Row counts by composer category (0 = other, 1-4) and status (0 = other, 1-2).
+    """
+    combined = _demographic_codes(df, col_category, col_status)
+    return np.bincount(combined, minlength=N_CATEGORY * N_STATUS).reshape(N_CATEGORY, N_STATUS)
+
+
+def demographics(df: pd.DataFrame, col_category, col_status) -> dict:
+    """
+    Gender, ethnicity, demographic group, vital status and group x status
+    counts for the given rows.
+    """
+    return summarize(contingency_table(df, col_category, col_status))
+
+
+def summarize(table: np.ndarray) -> dict:
+    """
+    Every dashboard breakdown of a category x status contingency table.
+    """
+    by_group = table.sum(axis=1)
+    by_status = table.sum(axis=0)
+    total = int(table.sum())
+
+    groups = {grp: int(by_group[code]) for grp, code in GROUP_CODES.items()}
+    male = groups['White Men'] + groups['BBIA Men']
+    female = groups['White Women'] + groups['BBIA Women']
+
+    records = [
+        {'Group': grp, 'Status': status, 'Count': int(table[code, status_code])}
+        for grp, code in GROUP_CODES.items()
+        for status, status_code in STATUS_CODES.items()
+    ]
+    group_status = pd.DataFrame(records)
+    group_status['GroupStatus'] = group_status['Group'] + "_" + group_status['Status']
+
+    return {
+        'total': total,
+        'gender': {'Male': male, 'Female': female, 'NB': total - male - female},
+        'ethnicity': {
+            'White': groups['White Men'] + groups['White Women'],
+            'BBIA': groups['BBIA Men'] + groups['BBIA Women'],
+        },
+        'groups': groups,
+        'status': {status: int(by_status[code]) for status, code in STATUS_CODES.items()},
+        'group_status': group_status,
+    }
+
+
+def work_ids(df: pd.DataFrame, col_composer, col_piece):
+    """
+    Integer work id per row (-1 where unknown): the normalized WORK_ID column
+    when present, else one id per distinct composer+piece combination. None
+    if there is no piece column.
+    """
+    if WORK_ID in df.columns:
+        return df[WORK_ID].to_numpy()
+    if col_piece and col_composer:
+        return df.groupby([col_composer, col_piece], dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    if col_piece:
+        return pd.factorize(df[col_piece])[0]
+    return None
+
+
+def performer_ids(df: pd.DataFrame, col_performer):
+    """
+    Integer performer id per row (-1 where missing), or None without a performer column.
+    """
+    if PERFORMER_ID in df.columns:
+        return df[PERFORMER_ID].to_numpy()
+    if col_performer:
+        return pd.factorize(df[col_performer])[0]
+    return None
+
+
+def n_distinct(ids: np.ndarray) -> int:
+    """
+    Number of distinct non-negative ids.
+    """
+    ids = ids[ids >= 0]
+    return int(np.count_nonzero(np.bincount(ids))) if len(ids) else 0
+
+
+def distinct_counts(df: pd.DataFrame, col_composer, col_piece, col_performer) -> dict:
+    """
+    Distinct works and performers in the rows, counted on integer ids.
+    """
+    works = work_ids(df, col_composer, col_piece)
+    performers = performer_ids(df, col_performer)
+    return {
+        'works': n_distinct(works) if works is not None else None,
+        'performers': n_distinct(performers) if performers is not None else None,
+    }
+
+
+class _DistinctSets:
+    """
+    Exact set of distinct ids per cube cell, stored as one sorted id array
+    sliced by cell offsets.
+    """
+
+    def __init__(self, cell_of_row: np.ndarray, ids: np.ndarray, n_cells: int):
+        valid = ids >= 0
+        n_ids = int(ids.max()) + 1 if valid.any() else 1
+        pairs = np.unique(cell_of_row[valid].astype(np.int64) * n_ids + ids[valid])
+        self.ids = pairs % n_ids
+        self.offsets = np.searchsorted(pairs // n_ids, np.arange(n_cells + 1))
+
+    def count(self, cells) -> int:
+        parts = [self.ids[self.offsets[c]:self.offsets[c + 1]] for c in cells]
+        return len(np.unique(np.concatenate(parts))) if parts else 0
+
+
+class DemographicCube:
+    """
+    Row counts by Academic Year x Semester x Performance Type x composer
+    category x composer status, plus the exact sets of distinct work and
+    performer ids in each (Academic Year, Semester, Performance Type) cell.
+
+    Built once per dataset load from the filter index's integer codes;
+    answers the dashboard summary for selections without a composer or
+    performer filter.
+    """
+
+    ROLES = ("academic_year", "semester", "perf_type")
+
+    def __init__(self, df: pd.DataFrame, columns: dict, index):
+        self.dims = [index.dims.get(role) for role in self.ROLES]
+        codes = np.column_stack([
+            dim.codes if dim else np.zeros(len(df), dtype=np.int32) for dim in self.dims
+        ])
+        self.cells, cell_of_row = np.unique(codes, axis=0, return_inverse=True)
+        cell_of_row = cell_of_row.reshape(-1)
+        n_cells = len(self.cells)
+
+        combined = cell_of_row * (N_CATEGORY * N_STATUS) + _demographic_codes(
+            df, columns.get('comp_gen'), columns.get('comp_status')
+        )
+        self.tables = np.bincount(combined, minlength=n_cells * N_CATEGORY * N_STATUS).reshape(
+            n_cells, N_CATEGORY, N_STATUS
+        )
+
+        works = work_ids(df, columns.get('composer'), columns.get('piece'))
+        self.works = _DistinctSets(cell_of_row, works, n_cells) if works is not None else None
+        performers = performer_ids(df, columns.get('performer'))
+        self.performers = _DistinctSets(cell_of_row, performers, n_cells) if performers is not None else None
+
+    def _cell_mask(self, academic_years, semesters, perf_types) -> np.ndarray:
+        ay_dim, sem_dim, pt_dim = self.dims
+        mask = np.ones(len(self.cells), dtype=bool)
+        # Academic Year OR Semester (a missing column matches everything)
+        if ay_dim and sem_dim:
+            mask = (np.isin(self.cells[:, 0], ay_dim.codes_of(academic_years))
+                    | np.isin(self.cells[:, 1], sem_dim.codes_of(semesters)))
+        # AND Performance Type (empty selection → no filter)
+        if perf_types and pt_dim:
+            mask &= np.isin(self.cells[:, 2], pt_dim.codes_of(perf_types))
+        return mask
+
+    def summary(self, academic_years, semesters, perf_types) -> dict:
+        """
+        The same summary as demographics() plus distinct_counts(), for the
+        rows matching (Academic Year OR Semester) AND Performance Type.
+        """
+        cells = np.flatnonzero(self._cell_mask(academic_years, semesters, perf_types))
+        summary = summarize(self.tables[cells].sum(axis=0))
+        summary['works'] = self.works.count(cells) if self.works is not None else None
+        summary['performers'] = self.performers.count(cells) if self.performers is not None else None
+        return summary
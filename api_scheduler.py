@@ -0,0 +1,212 @@
+"""
+Rate-limit-aware scheduling of AI_detect.py's API calls.
+
+Every call goes through one RequestScheduler shared by all workers, which
+
+- waits on token buckets for requests per minute and (estimated) tokens per
+  minute, so a batch runs at the allowed rate instead of into 429s;
+- caps calls in flight with an adaptive (AIMD) limit: halved once per burst
+  of 429s, raised by one after a full window of successes;
+- retries 429s, 5xx responses and connection errors with exponential
+  backoff and full jitter, honoring the server's Retry-After header.
+"""
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 6
+BACKOFF_BASE = 0.5   # seconds before the first retry (before jitter)
+BACKOFF_MAX = 30.0   # longest exponential backoff (Retry-After is not capped)
+CHARS_PER_TOKEN = 4  # rough prompt-size estimate for the token bucket
+
+
+def estimate_tokens(payload: dict) -> int:
+    """
+    Rough token count of a completions request: prompt characters / 4 plus
+    the requested completion tokens.
+    """
+    return len(str(payload.get("prompt", ""))) // CHARS_PER_TOKEN + int(payload.get("max_tokens", 0))
+
+
+def retry_after_seconds(value):
+    """
+    Seconds to wait from a Retry-After header (delay-seconds or HTTP date),
+    or None if absent or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` units per minute up to a burst of `capacity`
+    (default: one second's worth, at least 1); acquire() blocks until enough
+    units are available.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        # Requests larger than the burst size would never fit: let them
+        # through once the bucket is full, leaving it in debt
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                wait = (amount - self._level) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that halves on throttling and grows by one after
+    `limit` consecutive successes (additive increase, multiplicative decrease).
+
+    Entering returns the admission epoch, the number of decreases so far.
+    A 429 for a call admitted before the last decrease belongs to the burst
+    that caused it, so a burst of concurrent 429s halves the limit only once.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.in_flight = 0
+        self.epoch = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify()
+
+    def throttled(self, epoch: int = None):
+        """
+        Halve the limit for a throttled call admitted in `epoch` (default:
+        the current one); calls admitted before the last decrease are ignored.
+        """
+        with self._cond:
+            if epoch is not None and epoch < self.epoch:
+                return
+            self.limit = max(self.minimum, self.limit // 2)
+            self.epoch += 1
+            self._successes = 0
+
+
+class RequestScheduler:
+    """
+    Rate limiting, adaptive concurrency and retries around session.post().
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 max_concurrency: int = 8, initial_concurrency: int = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        # Allow a full minute's tokens as burst so one long prompt can pass
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveLimit(initial_concurrency or max_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._stats_lock = threading.Lock()
+        self.counts = {"requests": 0, "retries": 0, "throttled": 0, "server_errors": 0, "connection_errors": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.counts[key] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {**self.counts, "concurrency_limit": self.concurrency.limit}
+
+    def backoff(self, attempt: int, retry_after=None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (0-based): the server's
+        Retry-After as given, else full-jitter exponential backoff of at
+        most `backoff_max`.
+        """
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post(self, session: "requests.Session", url: str, payload: dict, **kwargs) -> "requests.Response":
+        """
+        POST `payload` as JSON, waiting for rate-limit capacity and retrying
+        throttled, failed or unreachable calls. Returns the last response
+        (which may still be an error once retries are exhausted); raises the
+        last connection error if every attempt failed to connect.
+        """
+        import requests
+
+        tokens = estimate_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            if self.request_bucket:
+                self.request_bucket.acquire()
+            if self.token_bucket:
+                self.token_bucket.acquire(tokens)
+            retry_after = None
+            with self.concurrency as admitted:
+                self._count("requests")
+                try:
+                    resp = session.post(url, json=payload, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    self._count("connection_errors")
+                    if attempt == self.max_retries:
+                        raise
+                    resp = None
+            if resp is not None:
+                if resp.status_code not in RETRY_STATUSES:
+                    self.concurrency.success()
+                    return resp
+                if resp.status_code == 429:
+                    self._count("throttled")
+                    self.concurrency.throttled(admitted)
+                else:
+                    self._count("server_errors")
+                if attempt == self.max_retries:
+                    return resp
+                retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+            self._count("retries")
+            time.sleep(self.backoff(attempt, retry_after))
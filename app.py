@@ -1,13 +1,31 @@
+import os
+import time
+import tempfile
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import altair as alt
 
+import data_store
+from name_search import NameSearch
+from query_engine import QueryEngine, FilterSpec
+import aggregates
+import export
+import profiling
+import sql_backend
+
 # ——— Page config ———
 st.set_page_config(
     page_title="University of the Pacific Conservatory of Music Programming Database",
     layout="wide"
 )
 
+# Stage timings for this rerun (see profiling.py); the sidebar panel is
+# opt-in with ?profile=1 or UOP_PROFILE=1
+profiler = profiling.RerunProfiler.from_env(st.query_params)
+profiler.start("page setup")
+
 # ——— Custom CSS for Tighter Layout ———
 st.markdown("""
     <style>
@@ -37,61 +55,86 @@ st.markdown(
 )
 st.markdown("---")
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("LongForm.csv")
-    # Drop unwanted columns if present
-    for col in ["Year", "Composer dates"]:
-        if col in df.columns:
-            df = df.drop(columns=[col])
-    # Normalize column names: strip and lowercase
-    df.columns = df.columns.str.strip().str.lower()
-    return df
-
-df = load_data()
+# Copy-on-write lets every session share one frame: derived frames never
+# write through to it (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+profiler.start("load data")
+
+# Only the current data version is kept: when the source export changes,
+# the previous frame and everything built from it are released
+DATA_VERSIONS_KEPT = 1
+
+@st.cache_resource(max_entries=DATA_VERSIONS_KEPT)
+def load_data(version):
+    # One frame per process, shared by every session; sessions only get
+    # shallow copy-on-write views of it (see below), never the object itself.
+    # `version` changes whenever the source export or typed store changes.
+    return data_store.load_dataset()
+
+@st.cache_resource(max_entries=DATA_VERSIONS_KEPT)
+def load_engine(version):
+    # Filter index and pre-aggregated cube over the shared frame; read-only,
+    # so one shared instance per data version is safe
+    return QueryEngine(load_data(version))
+
+@st.cache_resource(max_entries=DATA_VERSIONS_KEPT)
+def load_name_search(version):
+    # Type-ahead indexes for the Composer and Performer pickers
+    data = load_data(version)
+    index = load_engine(version).index
+    columns = data_store.detect_columns(data.columns)
+    searches = {}
+    for role in ('composer', 'performer'):
+        if role not in index.dims:
+            continue
+        aliases = ()
+        if role == 'composer' and columns['composer_sort']:
+            # Also match the "Last, First" spelling of composer names
+            aliases = data[[columns['composer_sort'], columns['composer']]].dropna().drop_duplicates()
+            aliases = list(aliases.itertuples(index=False, name=None))
+        searches[role] = NameSearch(index.options(role), aliases, index.dims[role].value_counts())
+    return searches
+
+data_version = data_store.data_version()
+# Zero-copy view of the shared frame; copy-on-write keeps any change made
+# by this session off the shared copy
+df = load_data(data_version).copy(deep=False)
+profiler.rows(len(df))
+profiler.start("indexes")
+engine = load_engine(data_version)
+filter_index = engine.index
+name_search = load_name_search(data_version)
 
 
 # ——— Detect actual column names ———
 cols = df.columns.tolist()
-
-def detect_column(keywords):
-    for col in cols:
-        if all(k in col for k in keywords):
-            return col
-    return None
-
-col_semester = detect_column(['semester'])
-
-# Detect Academic Year column
-col_academic_year = detect_column(['academic', 'year'])
-
-col_concert = detect_column(['concert'])
-col_index = detect_column(['index'])
-col_performer = detect_column(['performer'])           # name of the musician
-col_perf_type = detect_column(['performance type'])    # type of performance
+roles = data_store.detect_columns(cols)
+
+col_semester = roles['semester']
+col_academic_year = roles['academic_year']
+col_concert = roles['concert']
+col_index = roles['index']
+col_performer = roles['performer']         # name of the musician
+col_perf_type = roles['perf_type']         # type of performance
 # Performer Cohort (from Performer Type column)
-col_kind = detect_column(['performer type'])
-col_instrument = detect_column(['instrument'])
+col_kind = roles['kind']
+col_instrument = roles['instrument']
 # Composer name, excluding category/status/gen
-col_composer_name = next(
-    (c for c in cols if 'composer' in c and all(x not in c for x in ['category','status','gen'])),
-    None
-)
-col_piece = detect_column(['piece'])
-col_date_time = detect_column(['date'])
-col_date = None
-if col_date_time:
-    # Format date as e.g. Jan. 1, 2025, leave blank if missing
-    df['date_clean'] = pd.to_datetime(df[col_date_time], errors='coerce').apply(
-        lambda dt: dt.strftime('%b. ') + str(dt.day) + ', ' + dt.strftime('%Y') if pd.notna(dt) else ""
-    )
-    col_date = 'date_clean'
+col_composer_name = roles['composer']
+col_piece = roles['piece']
+col_date_time = roles['date']
+# Display dates (e.g. Jan. 1, 2025, blank if missing) are formatted at ingest;
+# col_date_time keeps the real datetime for sorting
+col_date = data_store.DATE_DISPLAY_COLUMN if data_store.DATE_DISPLAY_COLUMN in cols else None
 
 # Detect composer demographics columns
-col_comp_gen = detect_column(['composer category'])
-col_comp_status = detect_column(['composer status'])
+col_comp_gen = roles['comp_gen']
+col_comp_status = roles['comp_status']
 
     # Sidebar filters
+profiler.start("sidebar")
 # ——— Sidebar Logo ———
 st.sidebar.image("UoP_Logo.svg", use_container_width=True)
 
@@ -111,9 +154,9 @@ filters = {}
 # Academic Year filter as checkboxes
 ay_selected = []
 if col_academic_year:
-    opts_ay = sorted(df[col_academic_year].dropna().unique())
+    opts_ay = filter_index.options('academic_year')
     # disable if any semester is selected
-    sem_opts = sorted(df[col_semester].dropna().unique()) if col_semester else []
+    sem_opts = filter_index.options('semester')
     sem_selected = [s for s in sem_opts if st.session_state.get(f"Sem_{s}", False)]
     disabled_ay = bool(sem_selected)
     st.sidebar.subheader("Academic Year")
@@ -127,9 +170,9 @@ filters['Academic Year'] = ay_selected
 # Semester filter as checkboxes
 sem_selected = []
 if col_semester:
-    opts_sem = sorted(df[col_semester].dropna().unique())
+    opts_sem = filter_index.options('semester')
     # disable if any academic year is selected
-    ay_opts = sorted(df[col_academic_year].dropna().unique()) if col_academic_year else []
+    ay_opts = filter_index.options('academic_year')
     ay_selected = [a for a in ay_opts if st.session_state.get(f"AY_{a}", False)]
     disabled_sem = bool(ay_selected)
     st.sidebar.subheader("Semester")
@@ -143,7 +186,7 @@ filters['Semester'] = sem_selected
  # Performance Type filter as checkboxes
 pt_selected = []
 if col_perf_type:
-    opts_pt = sorted(df[col_perf_type].dropna().unique())
+    opts_pt = filter_index.options('perf_type')
     st.sidebar.subheader("Performance Type")
     for opt in opts_pt:
         if st.sidebar.checkbox(opt, key=f"PT_{opt}"):
@@ -155,16 +198,20 @@ else:
 
 
 
-# Composer autocomplete dropdown
-composer_opts = sorted(df[col_composer_name].dropna().unique()) if col_composer_name else []
-composer_opts = ["All"] + composer_opts
-composer_select = st.sidebar.selectbox("Composer", composer_opts)
+# Composer and Performer type-ahead: only the top matches for the typed
+# text are sent to the browser, not every distinct name
+SEARCH_TOP_K = 25
 
-# Performer autocomplete dropdown
+def name_picker(label, role):
+    query = st.sidebar.text_input(label, placeholder=f"Type to search {label.lower()}s")
+    matches = name_search[role].search(query, k=SEARCH_TOP_K) if query.strip() and role in name_search else []
+    # Preselect the best match once something has been typed
+    return st.sidebar.selectbox(
+        f"{label} match", ["All"] + matches, index=1 if matches else 0, label_visibility="collapsed"
+    )
 
-performer_opts = sorted(df[col_performer].dropna().unique()) if col_performer else []
-performer_opts = ["All"] + performer_opts
-performer_select = st.sidebar.selectbox("Performer", performer_opts)
+composer_select = name_picker("Composer", 'composer')
+performer_select = name_picker("Performer", 'performer')
 
 # Build dynamic filter summary below titles
 ay_list = filters.get('Academic Year', [])
@@ -186,107 +233,47 @@ filter_summary = (
 )
 
 
-# Apply filters: Academic Year OR Semester, AND Performance Type
-# Academic Year mask
-if col_academic_year:
-    ay_selected = filters.get('Academic Year', [])
-    mask_ay = df[col_academic_year].isin(ay_selected)
-else:
-    mask_ay = pd.Series(True, index=df.index)
-
-# Semester mask
-if col_semester:
-    sem_selected = filters.get('Semester', [])
-    mask_sem = df[col_semester].isin(sem_selected)
-else:
-    mask_sem = pd.Series(True, index=df.index)
-
-# Combine AY and Semester with OR
-mask_as = mask_ay | mask_sem
-
-# Performance Type mask (empty selection → no filter)
-if col_perf_type:
-    pt_selected = filters.get('Performance Type', [])
-    if pt_selected:
-        mask_pt = df[col_perf_type].isin(pt_selected)
-    else:
-        mask_pt = pd.Series(True, index=df.index)
-else:
-    mask_pt = pd.Series(True, index=df.index)
-
-# Apply combined mask
-filtered = df[mask_as & mask_pt]
-
-# Apply composer dropdown filter
-if composer_select != "All" and col_composer_name:
-    filtered = filtered[filtered[col_composer_name] == composer_select]
-
-# Apply performer dropdown filter
-if performer_select != "All" and col_performer:
-    filtered = filtered[filtered[col_performer] == performer_select]
-
-# ——— Sort by Academic Year, Semester (Fall, Spring), then Index ———
-if col_academic_year and col_semester and col_index:
-    filtered = filtered.copy()
-    # Extract season for sorting (Fall before Spring), preserve full semester labels
-    season = filtered[col_semester].str.extract(r'(Fall|Spring)', expand=False)
-    filtered['_sem_order'] = pd.Categorical(season, categories=['Fall','Spring'], ordered=True)
-    # Convert Index to numeric for correct ordering
-    try:
-        filtered[col_index] = pd.to_numeric(filtered[col_index])
-    except:
-        pass
-    # Sort by Academic Year, season order, then Index
-    filtered = filtered.sort_values(
-        by=[col_academic_year, '_sem_order', col_index]
-    )
-    filtered = filtered.drop(columns=['_sem_order'])
-# Fallback: original date, concert, index sorting
-elif col_date and col_concert and col_index:
-    filtered = filtered.copy()
-    try:
-        filtered[col_concert] = pd.to_numeric(filtered[col_concert])
-        filtered[col_index] = pd.to_numeric(filtered[col_index])
-    except:
-        pass
-    filtered = filtered.sort_values(
-        by=[col_date, col_concert, col_index]
-    )
-elif col_date:
-    filtered = filtered.sort_values(by=[col_date])
-
-# ——— Composer Demographics Gauges ———
-total = len(filtered)
-
-# Series for category and status
-comp_cat_series = filtered[col_comp_gen].dropna().astype(int) if col_comp_gen else pd.Series(dtype=int)
-comp_status_series = filtered[col_comp_status].dropna().astype(int) if col_comp_status else pd.Series(dtype=int)
-
-# Gender: Male codes 1 & 3, Female codes 2 & 4
-male = comp_cat_series.isin([1,3]).sum()
-female = comp_cat_series.isin([2,4]).sum()
-nb = total - male - female
-gender_counts = {'Male': male, 'Female': female, 'NB': nb}
-
-# Ethnicity: White codes 1 & 2, BBIA codes 3 & 4
-white = comp_cat_series.isin([1,2]).sum()
-bbia = comp_cat_series.isin([3,4]).sum()
-eth_counts = {'White': white, 'BBIA': bbia}
-
-# Demographic groups
-dem_counts = {
-    'White Men': (comp_cat_series==1).sum(),
-    'White Women': (comp_cat_series==2).sum(),
-    'BBIA Men': (comp_cat_series==3).sum(),
-    'BBIA Women': (comp_cat_series==4).sum()
-}
-
-# Vital status
-living = (comp_status_series==1).sum()
-deceased = (comp_status_series==2).sum()
-stat_counts = {'Living': living, 'Deceased': deceased}
+# Filtered, sorted rows and their aggregates, memoized per filter selection.
+# Reruns that don't change the selection (e.g. switching the distribution
+# view) or that return to a recent one are answered from these bounded LRUs.
+# The cached frames are shared between sessions: treat them as read-only.
+FILTER_CACHE_SIZE = 64
+
+@st.cache_resource(max_entries=FILTER_CACHE_SIZE)
+def filtered_rows(version, spec):
+    # Apply filters: (Academic Year OR Semester) AND Performance Type AND Composer AND Performer
+    return engine.frame(spec)
+
+@st.cache_resource(max_entries=FILTER_CACHE_SIZE)
+def selection_summary(version, spec):
+    # ——— Composer Demographics: one contingency table for every breakdown ———
+    # (answered from the pre-aggregated cube without a composer/performer filter)
+    if spec.composer is None and spec.performer is None:
+        return engine.summary(spec)
+    return engine.summary(spec, filtered_rows(version, spec))
+
+# Canonical, order-independent form of the selection (the cache key)
+filter_key = FilterSpec.of(
+    filters.get('Academic Year', []),
+    filters.get('Semester', []),
+    filters.get('Performance Type', []),
+    composer_select if composer_select != "All" else None,
+    performer_select if performer_select != "All" else None,
+)
+profiler.start("filter")
+filtered = filtered_rows(data_version, filter_key)
+profiler.rows(len(filtered))
+profiler.start("summary")
+summary = selection_summary(data_version, filter_key)
+total = summary['total']
+gender_counts = summary['gender']
+eth_counts = summary['ethnicity']
+dem_counts = summary['groups']
+stat_counts = summary['status']
+dem_status_df = summary['group_status']
 
 # ——— Composer Demographics Distribution Section ———
+profiler.start("charts")
 dem_section_cols = st.columns([1, 1])
 with dem_section_cols[0]:
     st.subheader("Composer Demographics Distribution")
@@ -322,19 +309,8 @@ with dem_section_cols[1]:
     st.caption("Chart reflects the currently filtered results.")
     st.markdown(filter_summary, unsafe_allow_html=True)
 
-    records = []
-    group_map = {'White Men': 1, 'White Women': 2, 'BBIA Men': 3, 'BBIA Women': 4}
-    for grp, code in group_map.items():
-        for status, status_code in [('Living', 1), ('Deceased', 2)]:
-            gen_series = pd.to_numeric(filtered[col_comp_gen], errors='coerce').fillna(0).astype(int)
-            stat_series = pd.to_numeric(filtered[col_comp_status], errors='coerce').fillna(0).astype(int)
-            count = ((gen_series == code) & (stat_series == status_code)).sum()
-            records.append({'Group': grp, 'Status': status, 'Count': count})
-    dem_status_df = pd.DataFrame(records)
-    dem_status_df['GroupStatus'] = dem_status_df['Group'] + "_" + dem_status_df['Status']
-
     chart_narrow = alt.Chart(dem_status_df).mark_bar().encode(
-        y=alt.Y("Group:N", sort=list(group_map.keys()), title=None),
+        y=alt.Y("Group:N", sort=list(aggregates.GROUP_CODES), title=None),
         x=alt.X("Count:Q", title="Count"),
         color=alt.Color(
             "GroupStatus:N",
@@ -392,20 +368,9 @@ if view_option == "Demographic Groups":
         st.subheader("Demographic Groups Distribution (stacked by Vital Status)")
         st.markdown(filter_summary, unsafe_allow_html=True)
 
-        # Prepare a DataFrame with counts of Living vs Deceased for each demographic group
-        records = []
-        group_map = {'White Men': 1, 'White Women': 2, 'BBIA Men': 3, 'BBIA Women': 4}
-        for grp, code in group_map.items():
-            for status, status_code in [('Living', 1), ('Deceased', 2)]:
-                gen_series = pd.to_numeric(filtered[col_comp_gen], errors='coerce').fillna(0).astype(int)
-                stat_series = pd.to_numeric(filtered[col_comp_status], errors='coerce').fillna(0).astype(int)
-                count = ((gen_series == code) & (stat_series == status_code)).sum()
-                records.append({'Group': grp, 'Status': status, 'Count': count})
-        dem_status_df = pd.DataFrame(records)
-        dem_status_df['GroupStatus'] = dem_status_df['Group'] + "_" + dem_status_df['Status']
-
+        # Counts of Living vs Deceased for each demographic group (from the cached summary)
         chart_dem = alt.Chart(dem_status_df).mark_bar().encode(
-            y=alt.Y("Group:N", sort=list(group_map.keys()), title=None),
+            y=alt.Y("Group:N", sort=list(aggregates.GROUP_CODES), title=None),
             x=alt.X("Count:Q", title="Count"),
             color=alt.Color(
                 "GroupStatus:N",
@@ -441,60 +406,149 @@ else:
     st.altair_chart(chart_stat, use_container_width=True)
 
 # ——— Main UI ———
+profiler.start("metrics")
 st.header("Music Performance Dashboard")
 st.markdown(filter_summary, unsafe_allow_html=True)
 
 # Summary metrics
 col1, col2, col3 = st.columns(3)
-col1.metric("Total Performances", len(filtered))
+col1.metric("Total Performances", total)
 
 # Distinct Works metric: count unique composer+piece combinations
-if col_piece and col_composer_name:
-    unique_works = filtered[[col_composer_name, col_piece]].drop_duplicates().shape[0]
-    col2.metric("Distinct Works", unique_works)
-elif col_piece:
-    col2.metric("Distinct Works", filtered[col_piece].nunique())
-else:
-    col2.metric("Distinct Works", "N/A")
+col2.metric("Distinct Works", summary['works'] if summary['works'] is not None else "N/A")
 
 # Distinct Performers metric
-if col_performer:
-    col3.metric("Distinct Performers", filtered[col_performer].nunique())
-else:
-    col3.metric("Distinct Performers", "N/A")
+col3.metric("Distinct Performers", summary['performers'] if summary['performers'] is not None else "N/A")
 
 # Performance Details table
 st.subheader("Performance Details")
 st.caption("Table shows records matching current filters.")
-display_cols = []
-rename_map = {}
-if col_semester:      display_cols.append(col_semester);      rename_map[col_semester] = "Semester"
-if col_date:          display_cols.append(col_date);          rename_map[col_date] = "Date"
-if col_performer:     display_cols.append(col_performer);     rename_map[col_performer] = "Performer"
-if col_instrument:    display_cols.append(col_instrument);    rename_map[col_instrument] = "Instrument"
-if col_composer_name: display_cols.append(col_composer_name); rename_map[col_composer_name] = "Composer"
-if col_piece:         display_cols.append(col_piece);         rename_map[col_piece] = "Piece"
-
-df_display = filtered[display_cols].rename(columns=rename_map)
-
-# Download filtered results
-# import io
-# towrite = io.BytesIO()
-# df_display.to_excel(towrite, index=False, sheet_name='Data')
-# towrite.seek(0)
-# st.download_button(
-#     label="Download data as Excel (.xlsx)",
-#     data=towrite,
-#     file_name="filtered_data.xlsx",
-#     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-# )
+display_cols = engine.display_columns
+rename_map = engine.display_names
+
+@st.cache_resource(max_entries=FILTER_CACHE_SIZE)
+def table_view(version, filter_key, search, sort_by, descending):
+    # Searched and sorted display frame for a filter selection; pages are
+    # sliced from this, so paging never re-filters or re-sorts
+    return engine.table(filter_key, search, sort_by, descending, frame=filtered_rows(version, filter_key))
+
+# Table controls
+t1, t2, t3, t4 = st.columns([3, 2, 1, 1])
+table_search = t1.text_input("Search table", "").strip()
+sort_labels = {"Default order": None, **{rename_map[c]: c for c in display_cols}}
+sort_choice = t2.selectbox("Sort by", list(sort_labels))
+sort_desc = t3.selectbox("Order", ["Ascending", "Descending"]) == "Descending"
+page_size = t4.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+profiler.start("table view")
+df_display = table_view(data_version, filter_key, table_search, sort_labels[sort_choice], sort_desc)
+n_pages = max(1, -(-len(df_display) // page_size))
+profiler.rows(len(df_display))
+
+profiler.start("export controls")
+# Download filtered results: the file is only built when the button is
+# clicked, and reused from the export cache for the same selection
+def export_file(fmt):
+    key = (data_version, filter_key, table_search, sort_labels[sort_choice], sort_desc)
+    path = export.cached_export(
+        key, fmt, lambda: table_view(data_version, filter_key, table_search, sort_labels[sort_choice], sort_desc)
+    )
+    with open(path, "rb") as f:
+        return f.read()
+
+export_formats = [f for f in export.FORMATS if f != "Parquet" or data_store.HAVE_ARROW]
+x1, x2 = st.columns([1, 3])
+export_format = x1.selectbox("Download format", export_formats)
+ext, mime = export.FORMATS[export_format]
+x2.download_button(
+    label=f"Download data as {export_format}",
+    data=partial(export_file, export_format),
+    file_name=f"filtered_data.{ext}",
+    mime=mime
+)
 
 # ——— Sidebar ICD Logo ———
 st.sidebar.markdown("<br><br><br>", unsafe_allow_html=True)
 st.sidebar.image("powered by.png", use_container_width=True)
 
-# Display filtered results table
-st.write(f"Displaying {len(df_display)} records:")
-# Render table without index using HTML
-html_table = df_display.to_html(index=False)
+# Display filtered results table, one page at a time
+profiler.start("table render")
+page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+start = (page - 1) * page_size
+page_df = df_display.iloc[start:start + page_size]
+if len(df_display):
+    st.write(f"Displaying {start + 1}–{start + len(page_df)} of {len(df_display)} records (page {page} of {n_pages}):")
+else:
+    st.write("Displaying 0 records:")
+# Render only the visible page without index using HTML
+html_table = page_df.to_html(index=False)
 st.markdown(html_table, unsafe_allow_html=True)
+profiler.rows(len(page_df))
+
+# ——— Ad-hoc SQL query panel ———
+profiler.start("sql panel")
+SQL_ROW_LIMITS = [100, 1000, 10000]
+SQL_EXAMPLE = (
+    "SELECT instrument, COUNT(*) AS performances\n"
+    "FROM performances\n"
+    "WHERE composer_group = 'BBIA Women' AND composer_vital_status = 'Living'\n"
+    "  AND perf_type = 'Chamber' AND year >= 2015\n"
+    "GROUP BY instrument ORDER BY performances DESC"
+)
+
+@st.cache_resource(max_entries=DATA_VERSIONS_KEPT)
+def load_sql_database(version):
+    # Built on first use, one file per data version shared by every session
+    data = load_data(version)
+    try:
+        return sql_backend.ensure_database(data, version)
+    except OSError:
+        # Read-only deployments: keep the database in the temp directory
+        path = os.path.join(tempfile.gettempdir(), "uop_dashboard.sqlite")
+        return sql_backend.ensure_database(data, version, path)
+
+@st.cache_data(max_entries=FILTER_CACHE_SIZE, show_spinner=False)
+def sql_result(version, sql, max_rows):
+    return sql_backend.run_query(sql, load_sql_database(version), max_rows, sql_backend.DEFAULT_TIMEOUT)
+
+with st.expander("Ad-hoc SQL query (read-only)"):
+    st.caption(
+        "One SELECT over the `performances` table (one row per performance): semester, academic_year, "
+        "date, year, perf_type, performer, instrument, composer, piece, composer_group "
+        "(White Men, White Women, BBIA Men, BBIA Women), composer_vital_status (Living, Deceased), "
+        f"composer_id, performer_id, work_id. Queries stop after {sql_backend.DEFAULT_TIMEOUT:g} s."
+    )
+    sql_text = st.text_area("SQL", placeholder=SQL_EXAMPLE, height=140)
+    q1, q2 = st.columns([1, 3])
+    sql_limit = q1.selectbox("Row limit", SQL_ROW_LIMITS, index=1)
+    if q2.button("Run query") and sql_text.strip():
+        st.session_state["sql_query"] = (sql_text, sql_limit)
+    if "sql_query" in st.session_state:
+        sql_query, sql_query_limit = st.session_state["sql_query"]
+        try:
+            sql_started = time.perf_counter()
+            sql_df, sql_truncated = sql_result(data_version, sql_query, sql_query_limit)
+        except sql_backend.QueryError as e:
+            st.error(str(e))
+        else:
+            st.dataframe(sql_df, hide_index=True, use_container_width=True)
+            st.caption(
+                f"{len(sql_df)} rows in {(time.perf_counter() - sql_started) * 1000:.0f} ms"
+                + (f" (first {sql_query_limit} shown)" if sql_truncated else "")
+            )
+            profiler.rows(len(sql_df))
+
+# ——— Profiling panel ———
+rerun_profile = profiler.finish()
+if profiler.panel:
+    with st.sidebar.expander("Profiling", expanded=True):
+        st.caption(
+            f"Rerun: {rerun_profile['total_ms']:.0f} ms, process RSS {rerun_profile['rss_mb']:.0f} MB"
+        )
+        st.dataframe(
+            pd.DataFrame(rerun_profile["stages"]).rename(columns={
+                "stage": "Stage", "ms": "Wall (ms)", "rows": "Rows", "rss_delta_mb": "RSS Δ (MB)"
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
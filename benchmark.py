@@ -0,0 +1,220 @@
+# benchmark.py
+
+"""
+Benchmark every dashboard stage on synthetic LongForm data.
+
+For each dataset size (10k, 100k and 1M rows by default) a LongForm-shaped
+CSV is generated with synthetic_data.py, then each stage the dashboard runs
+is timed through the same functions the app calls: reading and typing the
+export, column detection, date parsing and formatting, the canonical sort,
+identity assignment, the Parquet store round trip, the filter index, the
+demographic aggregations, distinct counts, name search and table rendering.
+
+Results are written as JSON and can be compared with a stored baseline; the
+run exits with status 1 when a stage is slower than the baseline by more than
+the tolerance.
+
+    python benchmark.py --sizes 10000 100000 --save-baseline
+    python benchmark.py --sizes 10000 100000 --compare
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import identity
+import aggregates
+import synthetic_data
+from filter_index import FilterIndex
+from name_search import NameSearch
+
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_PATH = "benchmark_results.json"
+BASELINE_PATH = "benchmark_baseline.json"
+# A stage regresses when it is this much slower than the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and by at least this many seconds (timer noise on very fast stages)
+MIN_REGRESSION_SECONDS = 0.005
+PAGE_SIZE = 50
+
+
+def time_stage(func, repeat: int):
+    """
+    Run `func` `repeat` times; returns (timings in seconds, last result).
+    """
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def bench_size(n_rows: int, repeat: int, seed: int, workdir: str) -> dict:
+    """
+    Time every stage on an `n_rows` synthetic dataset.
+    """
+    source = os.path.join(workdir, f"synthetic_{n_rows}.csv")
+    store = os.path.join(workdir, f"synthetic_{n_rows}.parquet")
+    synthetic_data.generate(n_rows, seed).to_csv(source, index=False)
+
+    stages = {}
+
+    def run(name, func, n=repeat):
+        timings, result = time_stage(func, n)
+        stages[name] = {
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "runs": len(timings),
+        }
+        print(f"  {name:<24} {stages[name]['median_s'] * 1000:10.1f} ms", flush=True)
+        return result
+
+    # Ingest: the cold-start path when the store is missing or stale
+    raw = run("read_source", lambda: data_store.read_source(source))
+    columns = run("detect_columns", lambda: data_store.detect_columns(raw.columns))
+    dates = run("parse_dates", lambda: data_store.parse_dates(raw[columns['date']]))
+    run("format_dates", lambda: data_store.format_dates(dates))
+    typed = run("apply_types", lambda: data_store.apply_types(raw))
+    run("row_hashes", lambda: data_store.row_hashes(raw))
+    ordered = run("sort_canonical", lambda: data_store.sort_canonical(typed))
+    df = run("identity_ids", lambda: identity.add_ids(ordered, columns))
+    if data_store.HAVE_ARROW:
+        run("write_store", lambda: data_store.write_store(df, store))
+        df = run("load_store", lambda: data_store.load_dataset(source, store))
+
+    # Per-load indexes, built once per data version in the app
+    columns = data_store.detect_columns(df.columns)
+    index = run("filter_index_build", lambda: FilterIndex(df, columns))
+    cube = run("cube_build", lambda: aggregates.DemographicCube(df, columns, index))
+    composers = index.options('composer')
+    run("name_search_build", lambda: NameSearch(composers, (), index.dims['composer'].value_counts()))
+
+    # Per-rerun work: a typical selection is one academic year, every
+    # performance type, optionally narrowed to the busiest composer
+    ay = [index.options('academic_year')[-1]]
+    sem = []
+    pt = index.options('perf_type')
+    top_composer = max(index.dims['composer'].value_counts().items(), key=lambda kv: kv[1])[0]
+    rows = run("filter_select", lambda: index.select(ay, sem, pt))
+    run("filter_select_composer", lambda: index.select(ay, sem, pt, composer=top_composer))
+    view = df.iloc[rows]
+    run("cube_summary", lambda: cube.summary(ay, sem, pt))
+    run("demographics", lambda: aggregates.demographics(view, columns['comp_gen'], columns['comp_status']))
+    run("distinct_counts", lambda: aggregates.distinct_counts(
+        view, columns['composer'], columns['piece'], columns['performer']
+    ))
+    searcher = NameSearch(composers, (), index.dims['composer'].value_counts())
+    run("name_search_query", lambda: searcher.search("bach", 25))
+
+    display_cols = [c for c in (columns['semester'], data_store.DATE_DISPLAY_COLUMN, columns['performer'],
+                                columns['instrument'], columns['composer'], columns['piece']) if c]
+    whole = df[display_cols]
+    run("table_sort_by_date", lambda: df.sort_values(by=columns['date'], kind="stable", na_position="last"))
+    run("table_page_html", lambda: whole.iloc[:PAGE_SIZE].to_html(index=False))
+
+    return {"rows": n_rows, "selected_rows": int(len(rows)), "stages": stages}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Stages slower than the baseline by more than `tolerance` (a fraction)
+    and MIN_REGRESSION_SECONDS, as (size, stage, baseline s, current s).
+    """
+    regressions = []
+    for size, current in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        for stage, timing in current["stages"].items():
+            before = base["stages"].get(stage)
+            if not before:
+                continue
+            old, new = before["median_s"], timing["median_s"]
+            if new > old * (1 + tolerance) and new - old > MIN_REGRESSION_SECONDS:
+                regressions.append((size, stage, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the dashboard's data stages on synthetic LongForm data."
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs='+',
+        type=int,
+        default=DEFAULT_SIZES,
+        help="Dataset sizes in rows."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (the median is reported).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data.")
+    parser.add_argument("-o", "--output", default=RESULTS_PATH, help="Path of the JSON results file.")
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_PATH,
+        help="Path of the stored baseline results."
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare against the stored baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed slowdown before a stage counts as a regression (0.25 = 25%%)."
+    )
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "pyarrow": data_store.HAVE_ARROW,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="uop_bench_") as workdir:
+        for n_rows in args.sizes:
+            print(f"{n_rows} rows:", flush=True)
+            results["sizes"][str(n_rows)] = bench_size(n_rows, args.repeat, args.seed, workdir)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote results to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"Error: no baseline at {args.baseline}; run with --save-baseline first.", file=sys.stderr)
+            sys.exit(1)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if not regressions:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+            return
+        print(f"{len(regressions)} regression(s) against {args.baseline}:")
+        for size, stage, old, new in regressions:
+            print(f"  {size} rows, {stage}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({new / old - 1:+.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Chunked scoring of long documents for AI_detect.py.
+
+A long text is split into windows of at most `size` words (consecutive
+windows sharing `overlap` words), each window is scored on its own,
+concurrently, and the window scores are combined into a document verdict:
+the mean window confidence (default) or the maximum, with the mean, the max
+and a per-chunk breakdown reported either way.
+
+With early exit, scoring stops as soon as the remaining windows can no
+longer change the verdict: for the mean, once the mean is bound to stay on
+one side of the threshold whatever the unscored windows return (each lies in
+0..100); for the max, once any window is above the threshold. The reported
+scores then cover only the windows scored.
+"""
+import re
+from typing import NamedTuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+VERDICT_THRESHOLD = 50.0
+COMBINE_MODES = ("mean", "max")
+
+_WORD = re.compile(r"\S+")
+
+
+class Chunking(NamedTuple):
+    """
+    Window size and overlap in words, how window scores are combined, and
+    whether scoring stops once the verdict is settled.
+    """
+    size: int
+    overlap: int = 0
+    combine: str = "mean"
+    early_exit: bool = False
+    threshold: float = VERDICT_THRESHOLD
+
+
+def verdict(confidence: float, threshold: float = VERDICT_THRESHOLD) -> str:
+    return "likely AI-generated" if confidence > threshold else "unlikely AI-generated"
+
+
+def split_windows(text: str, size: int, overlap: int = 0) -> list:
+    """
+    (first word number, word count, window text) of each window, keeping the
+    text's own spacing and line breaks within a window.
+    """
+    if size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    if not 0 <= overlap < size:
+        raise ValueError("Chunk overlap must be at least 0 and smaller than the chunk size.")
+    spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+    if len(spans) <= size:
+        return [(0, len(spans), text)]
+    windows, step = [], size - overlap
+    for first in range(0, len(spans), step):
+        last = min(first + size, len(spans)) - 1
+        windows.append((first, last - first + 1, text[spans[first][0]:spans[last][1]]))
+        if last == len(spans) - 1:
+            break
+    return windows
+
+
+def _settled(scores: list, n_windows: int, chunking: Chunking) -> bool:
+    if chunking.combine == "max":
+        return any(s > chunking.threshold for s in scores)
+    remaining = n_windows - len(scores)
+    lowest = sum(scores) / n_windows
+    highest = (sum(scores) + 100.0 * remaining) / n_windows
+    return lowest > chunking.threshold or highest <= chunking.threshold
+
+
+def score_chunked(text: str, score, pool, chunking: Chunking) -> dict:
+    """
+    Document verdict from concurrently scored windows. `score(window_text)`
+    returns a dict with "confidence" (0..100); windows are submitted to
+    `pool` (an executor).
+    """
+    windows = split_windows(text, chunking.size, chunking.overlap)
+    futures = {pool.submit(score, window_text): i for i, (_, _, window_text) in enumerate(windows)}
+    scores = {}
+    pending = set(futures)
+    settled_early = False
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                scores[futures[future]] = future.result()["confidence"]
+            if chunking.early_exit and pending and _settled(list(scores.values()), len(windows), chunking):
+                settled_early = True
+                break
+    finally:
+        # Windows not started yet are dropped; running ones finish unreported
+        for future in pending:
+            future.cancel()
+
+    ordered = sorted(scores)
+    values = [scores[i] for i in ordered]
+    mean = sum(values) / len(values)
+    top = max(values)
+    confidence = mean if chunking.combine == "mean" else top
+    return {
+        "verdict": verdict(confidence, chunking.threshold),
+        "confidence": round(confidence, 2),
+        "mean_confidence": round(mean, 2),
+        "max_confidence": round(top, 2),
+        "chunks_total": len(windows),
+        "chunks_scored": len(values),
+        "settled_early": settled_early,
+        "chunks": [
+            {
+                "chunk": i,
+                "first_word": windows[i][0],
+                "words": windows[i][1],
+                "confidence": round(scores[i], 2),
+                "verdict": verdict(scores[i], chunking.threshold),
+            }
+            for i in ordered
+        ],
+    }
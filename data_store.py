@@ -0,0 +1,445 @@
+"""
+Typed columnar store for the LongForm programming archive.
+
+The raw CSV/XLSX export is parsed once into a Parquet file whose columns are
+already typed (categoricals for the filter dimensions, datetimes, numeric
+indexes and demographic codes). The dashboard memory-maps that file instead of
+re-parsing text on every cold start, and only re-ingests the source export
+when its modification time or size differs from the export the store was
+built from (recorded in the store's metadata).
+
+Refreshes are incremental: rows are matched to the store by
+(Semester, Concert #, Index) and a hash of their raw content, and only new or
+changed rows are parsed and typed again.
+
+Run directly to bring the store up to date (or rebuild it with --full):
+
+    python data_store.py [LongForm.csv|LongForm.xlsx] [-o LongForm.parquet] [--full]
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import identity
+
+# Parquet support is optional: without pyarrow the dashboard still works,
+# it just types the CSV in memory on every cold start.
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_ARROW = True
+except ImportError:
+    HAVE_ARROW = False
+
+
+SOURCE_PATH = "LongForm.csv"
+STORE_PATH = "LongForm.parquet"
+# Bump whenever the stored columns or their dtypes change, so existing
+# stores are rebuilt instead of being read with a stale layout
+STORE_VERSION = "5"
+STORE_VERSION_KEY = b"longform_store_version"
+# Modification time and size of the source export the store was built from
+SOURCE_SIGNATURE_KEY = b"longform_source_signature"
+
+# Columns the dashboard never uses
+DROP_COLUMNS = ["Year", "Composer dates"]
+
+# Columns stored as pandas categoricals (low cardinality, used for filtering)
+CATEGORY_ROLES = ["semester", "academic_year", "perf_type", "composer", "performer"]
+# Columns parsed to numbers (invalid entries become NaN)
+NUMERIC_ROLES = ["concert", "index"]
+# Composer demographic codes, stored as nullable small integers
+CODE_ROLES = ["comp_gen", "comp_status"]
+
+# Rows are matched between the source and the store on these roles (plus an
+# occurrence number, since the archive has repeated keys) and this column,
+# a hash of the row's raw source values
+KEY_ROLES = ["semester", "concert", "index"]
+ROW_HASH_COLUMN = "_row_hash"
+
+# Position of each row in the dashboard's canonical order; the store is kept
+# sorted by it, so any filtered subset is already in display order
+SORT_RANK_COLUMN = "_sort_rank"
+
+# Display column holding dates formatted as e.g. "Jan. 1, 2025"
+DATE_DISPLAY_COLUMN = "date_clean"
+MONTH_ABBR = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def detect_column(cols, keywords):
+    """
+    Return the first column whose name contains all of the keywords.
+    """
+    for col in cols:
+        if all(k in col for k in keywords):
+            return col
+    return None
+
+
+def detect_columns(cols) -> dict:
+    """
+    Map each dashboard role to the matching (normalized) column name, or None.
+    """
+    cols = list(cols)
+    return {
+        "semester": detect_column(cols, ['semester']),
+        "academic_year": detect_column(cols, ['academic', 'year']),
+        "concert": detect_column(cols, ['concert']),
+        "index": detect_column(cols, ['index']),
+        "performer": detect_column(cols, ['performer']),
+        "perf_type": detect_column(cols, ['performance type']),
+        "kind": detect_column(cols, ['performer type']),
+        "instrument": detect_column(cols, ['instrument']),
+        # Composer name, excluding category/status/gen
+        "composer": next(
+            (c for c in cols if 'composer' in c and all(x not in c for x in ['category', 'status', 'gen'])),
+            None
+        ),
+        # Composer name in "Last, First" form
+        "composer_sort": detect_column(cols, ['ugly']),
+        "piece": detect_column(cols, ['piece']),
+        "date": detect_column(cols, ['date']),
+        "comp_gen": detect_column(cols, ['composer category']),
+        "comp_status": detect_column(cols, ['composer status']),
+    }
+
+
+def read_source(path: str = SOURCE_PATH) -> pd.DataFrame:
+    """
+    Read the raw CSV or XLSX export with normalized (stripped, lowercase) column names.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        df = pd.read_excel(path)
+    elif ext == ".csv":
+        df = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unsupported source file type: {ext}")
+    # Drop unwanted columns if present
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    # Normalize column names: strip and lowercase
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse date text, NaT where unparseable.
+
+    Each distinct string is parsed once, and each one on its own ("mixed"
+    format), so a subset of rows parses exactly as it would within the full
+    export.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = pd.DatetimeIndex(pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce', format='mixed'))
+    parsed = parsed.append(pd.DatetimeIndex([pd.NaT]))  # code -1 (missing) maps here
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def format_dates(dates: pd.Series) -> pd.Series:
+    """
+    Format datetimes as e.g. "Jan. 1, 2025" (no zero padding), blank for NaT.
+    """
+    out = pd.Series("", index=dates.index, dtype=str)
+    valid = dates.notna()
+    if valid.any():
+        d = dates[valid].dt
+        months = d.month.map(dict(enumerate(MONTH_ABBR, start=1)))
+        out[valid] = months + ". " + d.day.astype(str) + ", " + d.year.astype(str)
+    return out
+
+
+def apply_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert raw text columns to their analysis dtypes.
+    """
+    roles = detect_columns(df.columns)
+    df = df.copy()
+    for role in CATEGORY_ROLES:
+        col = roles[role]
+        if col:
+            df[col] = df[col].astype("category")
+    for role in NUMERIC_ROLES:
+        col = roles[role]
+        if col:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    for role in CODE_ROLES:
+        col = roles[role]
+        if col:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype("Int16")
+    if roles["date"]:
+        df[roles["date"]] = parse_dates(df[roles["date"]])
+        df[DATE_DISPLAY_COLUMN] = format_dates(df[roles["date"]])
+    return df
+
+
+def sort_canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sort typed rows into the dashboard's display order and number them in
+    SORT_RANK_COLUMN: Academic Year, season (Fall before Spring), then Index;
+    or, without those columns, Date, Concert # and Index.
+    """
+    roles = detect_columns(df.columns)
+    keys = {}
+    if roles["academic_year"] and roles["semester"] and roles["index"]:
+        # Extract season for sorting (Fall before Spring), preserve full semester labels
+        season = df[roles["semester"]].astype(object).str.extract(r'(Fall|Spring)', expand=False)
+        keys = {
+            "ay": df[roles["academic_year"]],
+            "season": pd.Categorical(season, categories=['Fall', 'Spring'], ordered=True),
+            "index": df[roles["index"]],
+        }
+    elif roles["date"] and roles["concert"] and roles["index"]:
+        keys = {"date": df[roles["date"]], "concert": df[roles["concert"]], "index": df[roles["index"]]}
+    elif roles["date"]:
+        keys = {"date": df[roles["date"]]}
+
+    if keys:
+        key_frame = pd.DataFrame({k: pd.Series(v).reset_index(drop=True) for k, v in keys.items()})
+        order = key_frame.sort_values(by=list(keys), kind="stable").index.to_numpy()
+        df = df.take(order).reset_index(drop=True)
+    df[SORT_RANK_COLUMN] = np.arange(len(df), dtype=np.int64)
+    return df
+
+
+def row_hashes(raw: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash of each row's raw source values.
+    """
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def _row_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    (Semester, Concert #, Index, occurrence) key for each row, comparable
+    between raw source rows and typed store rows.
+    """
+    roles = detect_columns(df.columns)
+    keys = pd.DataFrame(index=range(len(df)))
+    for role in KEY_ROLES:
+        col = roles[role]
+        values = df[col] if col else pd.Series(pd.NA, index=df.index)
+        if role in NUMERIC_ROLES:
+            values = pd.to_numeric(values, errors='coerce')
+        else:
+            values = values.astype(object)
+        keys[role] = values.to_numpy()
+    keys["occurrence"] = keys.groupby(KEY_ROLES, dropna=False).cumcount()
+    return keys
+
+
+def _concat_typed(frames) -> pd.DataFrame:
+    """
+    Concatenate typed frames, keeping categorical columns categorical (with
+    only the categories still in use, as a full ingest would have).
+    """
+    frames = [f for f in frames if len(f.columns)]
+    out = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        parts = [f[col] for f in frames]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            out[col] = union_categoricals([p.array for p in parts], sort_categories=True).remove_unused_categories()
+    return out
+
+
+def source_signature(source: str = SOURCE_PATH) -> str:
+    """
+    "mtime_ns:size" of the source export, or "" if it does not exist.
+    """
+    try:
+        stat = os.stat(source)
+    except FileNotFoundError:
+        return ""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def write_store(df: pd.DataFrame, store: str = STORE_PATH, signature: str = ""):
+    """
+    Write a typed frame to the Parquet store, recording the signature of the
+    source export it was built from (see source_signature()).
+
+    The store is written to a temporary file and swapped in atomically so a
+    concurrent reader never sees a partial file.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[STORE_VERSION_KEY] = STORE_VERSION.encode()
+    metadata[SOURCE_SIGNATURE_KEY] = signature.encode()
+    tmp = store + ".tmp"
+    pq.write_table(table.replace_schema_metadata(metadata), tmp)
+    os.replace(tmp, store)
+
+
+def _type_source(raw: pd.DataFrame) -> pd.DataFrame:
+    df = apply_types(raw)
+    df[ROW_HASH_COLUMN] = row_hashes(raw)
+    return df
+
+
+def _finish(df: pd.DataFrame, previous_ids: dict = None) -> pd.DataFrame:
+    """
+    Put typed rows in canonical order and add the composer/performer/work ids.
+    """
+    df = sort_canonical(df)
+    return identity.add_ids(df, detect_columns(df.columns), previous_ids)
+
+
+def ingest(source: str = SOURCE_PATH, store: str = STORE_PATH) -> pd.DataFrame:
+    """
+    Parse and type the whole source export and write it to the Parquet store.
+    """
+    # Taken before reading, so a source changed meanwhile stays stale
+    signature = source_signature(source)
+    df = _finish(_type_source(read_source(source)))
+    if HAVE_ARROW:
+        write_store(df, store, signature)
+    return df
+
+
+def _store_metadata(store: str) -> dict:
+    if not os.path.exists(store):
+        return {}
+    return pq.read_schema(store).metadata or {}
+
+
+def _has_current_layout(store: str) -> bool:
+    return _store_metadata(store).get(STORE_VERSION_KEY) == STORE_VERSION.encode()
+
+
+def refresh(source: str = SOURCE_PATH, store: str = STORE_PATH):
+    """
+    Bring the store up to date with the source export, re-typing only new or
+    changed rows. Falls back to a full ingest when there is no usable store.
+
+    Returns the typed frame and a summary with the number of added, changed
+    and removed rows and the semesters they belong to.
+    """
+    if not HAVE_ARROW or not _has_current_layout(store):
+        df = ingest(source, store)
+        col_sem = detect_columns(df.columns)["semester"]
+        semesters = sorted(df[col_sem].dropna().unique()) if col_sem else []
+        return df, {"added": len(df), "changed": 0, "removed": 0, "unchanged": 0, "semesters": semesters}
+
+    signature = source_signature(source)
+    raw = read_source(source)
+    current = pd.read_parquet(store, engine="pyarrow")
+    # Existing ids stay stable; rank and ids are recomputed for the merged rows
+    previous_ids = identity.id_tables(current, detect_columns(current.columns))
+    current = current.drop(columns=[SORT_RANK_COLUMN] + identity.ID_COLUMNS)
+
+    new_keys = _row_keys(raw)
+    new_keys["hash"] = row_hashes(raw)
+    new_keys["pos"] = np.arange(len(raw))
+    old_keys = _row_keys(current)
+    old_keys["hash"] = current[ROW_HASH_COLUMN].to_numpy()
+    old_keys["old_pos"] = np.arange(len(current))
+    matched = new_keys.merge(old_keys, on=KEY_ROLES + ["occurrence"], how="outer", suffixes=("", "_old"))
+
+    in_new = matched["pos"].notna()
+    in_old = matched["old_pos"].notna()
+    same = in_new & in_old & (matched["hash"] == matched["hash_old"])
+    kept = matched[same]
+    retype = matched[in_new & ~same]
+
+    # Unchanged rows come from the store as-is; the rest are typed from the source
+    reused = current.iloc[kept["old_pos"].astype(int).to_numpy()]
+    fresh = _type_source(raw.iloc[retype["pos"].astype(int).to_numpy()])
+    order = np.argsort(np.concatenate([kept["pos"].to_numpy(), retype["pos"].to_numpy()]), kind="stable")
+    df = _finish(_concat_typed([reused, fresh]).take(order).reset_index(drop=True), previous_ids)
+
+    touched = pd.concat([matched.loc[in_new & ~same, "semester"], matched.loc[in_old & ~same, "semester"]])
+    summary = {
+        "added": int((in_new & ~in_old).sum()),
+        "changed": int((in_new & in_old & ~same).sum()),
+        "removed": int((in_old & ~in_new).sum()),
+        "unchanged": int(same.sum()),
+        "semesters": sorted(touched.dropna().unique()),
+    }
+    # Rewritten even when no row changed, to record the new source signature
+    write_store(df, store, signature)
+    return df, summary
+
+
+def is_stale(source: str = SOURCE_PATH, store: str = STORE_PATH) -> bool:
+    """
+    True if the store is missing, was written by an older layout, or was
+    built from a source export with a different modification time or size
+    (older as well as newer, e.g. an export restored with `cp -p`).
+    """
+    metadata = _store_metadata(store)
+    if metadata.get(STORE_VERSION_KEY) != STORE_VERSION.encode():
+        return True
+    if not os.path.exists(source):
+        return False
+    return metadata.get(SOURCE_SIGNATURE_KEY, b"").decode() != source_signature(source)
+
+
+def load_dataset(source: str = SOURCE_PATH, store: str = STORE_PATH) -> pd.DataFrame:
+    """
+    Load the typed dataset, memory-mapping the Parquet store when it is current
+    and refreshing it from the source export when it is stale.
+    """
+    if HAVE_ARROW and not is_stale(source, store):
+        return pd.read_parquet(store, engine="pyarrow", memory_map=True)
+    try:
+        return refresh(source, store)[0]
+    except OSError:
+        # Read-only deployments: type the source in memory without caching it
+        return _finish(_type_source(read_source(source)))
+
+
+def data_version(source: str = SOURCE_PATH, store: str = STORE_PATH) -> str:
+    """
+    A value that changes whenever the underlying data changes, for cache keys.
+
+    Keyed on the source export's signature (or the store's, when there is no
+    source), never on the store's mtime: load_dataset() rewrites the store,
+    and that must not change the version it was loaded under.
+    """
+    signature = source_signature(source) or source_signature(store)
+    return f"{STORE_VERSION}:{signature}" if signature else STORE_VERSION
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or refresh the typed Parquet store from the LongForm export."
+    )
+    parser.add_argument(
+        "source",
+        nargs='?',
+        default=SOURCE_PATH,
+        help="Path to the LongForm CSV or XLSX export."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=STORE_PATH,
+        help="Path of the Parquet store to write."
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-parse every row instead of only new or changed ones."
+    )
+    args = parser.parse_args()
+
+    if not HAVE_ARROW:
+        print("Error: 'pyarrow' library not installed. Install with 'pip install pyarrow'.", file=sys.stderr)
+        sys.exit(1)
+    if args.full:
+        df = ingest(args.source, args.output)
+        print(f"Wrote {len(df)} rows to {args.output}")
+        return
+    df, summary = refresh(args.source, args.output)
+    print(f"{args.output}: {len(df)} rows "
+          f"({summary['added']} added, {summary['changed']} changed, {summary['removed']} removed)")
+    if summary["semesters"]:
+        print("Semesters updated: " + ", ".join(map(str, summary["semesters"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Detection calls and input expansion shared by AI_detect.py and its warm
+service mode (detector_service.py).
+
+Kept apart from AI_detect.py so the service, started by `AI_detect.py
+--serve`, imports these once instead of loading the script a second time.
+"""
+import os
+import sys
+import math
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from api_scheduler import RequestScheduler
+from text_extraction import extract_text, SUPPORTED_EXTENSIONS
+from chunked_scoring import Chunking, score_chunked, verdict
+from result_cache import ResultCache, TextCache, cache_key
+
+if TYPE_CHECKING:
+    import requests
+
+
+DEFAULT_API_URL = "https://api.openai.com/v1/completions"
+MODEL = "model-detect-v2"
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK_WORKERS = 8
+# Seconds to wait for the API to connect and to answer
+REQUEST_TIMEOUT = (10, 120)
+
+
+def make_session(api_key: str, pool_size: int = DEFAULT_WORKERS) -> "requests.Session":
+    """
+    Keep-alive session for the detection API, with up to `pool_size` pooled
+    connections so concurrent workers reuse connections instead of opening
+    a new TLS connection per call.
+    """
+    # Imported when the first session is made, not when the module loads
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        print("Error: 'requests' library not installed. Install with 'pip install requests'.", file=sys.stderr)
+        sys.exit(1)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    })
+    return session
+
+
+def build_payload(text: str) -> dict:
+    """
+    Completions request scoring `text` with the detection model.
+    """
+    return {
+        "model": MODEL,
+        "prompt": text.strip() + "\n</s><|disc_score|>",
+        "max_tokens": 1,
+        "temperature": 0,
+        "logprobs": 5,
+        "stop": ["\n"],
+    }
+
+
+def detect_ai(text: str, api_key: str, session: "requests.Session" = None, api_url: str = DEFAULT_API_URL,
+              scheduler: RequestScheduler = None) -> dict:
+    """
+    Send text to OpenAI detection model and return verdict and confidence.
+    With a `scheduler`, the call is rate limited and retried.
+    """
+    if session is None:
+        session = make_session(api_key, pool_size=1)
+    payload = build_payload(text)
+    if scheduler is not None:
+        resp = scheduler.post(session, api_url, payload, timeout=REQUEST_TIMEOUT)
+    else:
+        resp = session.post(api_url, json=payload, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    data = resp.json()
+    top_logprob = data["choices"][0]["logprobs"]["top_logprobs"][0].get("</s>", 0)
+    prob = math.exp(top_logprob)
+    confidence = 100 * (1 - prob)
+    return {"verdict": verdict(confidence), "confidence": round(confidence, 2)}
+
+
+def analyze_file(path: str, api_key: str, session: "requests.Session", api_url: str = DEFAULT_API_URL,
+                 cache: ResultCache = None, text_cache: TextCache = None,
+                 chunking: Chunking = None, window_pool: ThreadPoolExecutor = None,
+                 scheduler: RequestScheduler = None) -> dict:
+    """
+    Extract one file's text and return its detection result, from the cache
+    when the same request was answered before. With `chunking`, texts longer
+    than one window are scored window by window on `window_pool`.
+    """
+    def score(text):
+        if cache is None:
+            return detect_ai(text, api_key, session, api_url, scheduler)
+        key = cache_key(build_payload(text), api_url)
+        return cache.lookup(key, lambda: detect_ai(text, api_key, session, api_url, scheduler))
+
+    text = extract_text(path, text_cache)
+    if chunking is not None:
+        result = score_chunked(text, score, window_pool, chunking)
+    else:
+        result = score(text)
+    return {"file": os.path.basename(path), **result}
+
+
+def iter_inputs(items, files_from: str = None):
+    """
+    Paths named on the command line: files as given, directories searched
+    recursively for supported files and glob patterns expanded (both in
+    sorted order), followed by the paths listed one per line in `files_from`
+    ("-" reads the list from stdin). An existing file or directory is used
+    as given even if its name contains glob characters (e.g. "B[ass]oon").
+    """
+    def walk(directory):
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    yield os.path.join(root, name)
+
+    for item in items:
+        if os.path.isdir(item):
+            yield from walk(item)
+        elif not os.path.exists(item) and any(c in item for c in "*?["):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                print(f"Warning: No files match: {item}", file=sys.stderr)
+            for match in matches:
+                if os.path.isdir(match):
+                    yield from walk(match)
+                else:
+                    yield match
+        else:
+            yield item
+    if files_from:
+        f = sys.stdin if files_from == "-" else open(files_from, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+        finally:
+            if f is not sys.stdin:
+                f.close()
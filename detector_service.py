@@ -0,0 +1,205 @@
+# detector_service.py
+
+"""
+Warm service mode for AI_detect.py.
+
+`python AI_detect.py --serve 8770` keeps one process running with the API
+session and its connection pool, the result and text caches, the request
+scheduler, the worker pools and the format libraries loaded, and accepts
+jobs over local HTTP, so each job costs milliseconds of overhead instead of
+an interpreter start:
+
+    curl -s http://127.0.0.1:8770/analyze -d '{"files": ["/data/uploads/essay.pdf"]}'
+
+POST /analyze takes {"files": [...]} (files, directories or glob patterns,
+as on the command line; relative paths are resolved against the service's
+working directory) and answers {"analysis": [...], "errors": [...]} with
+results in input order. GET /stats returns job, cache and request counters.
+
+Both caches are pruned again (age, then size) every PRUNE_EVERY_JOBS jobs or
+after PRUNE_INTERVAL_S, whichever comes first, so a long-running service
+keeps them within --cache-max-age and --cache-max-mb.
+
+Jobs name files on the service's machine and are read with its permissions,
+so the service listens on 127.0.0.1 unless told otherwise.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import text_extraction
+from detection import DEFAULT_API_URL, DEFAULT_WORKERS, DEFAULT_CHUNK_WORKERS, make_session, analyze_file, iter_inputs
+from api_scheduler import RequestScheduler
+from result_cache import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB
+
+
+# Prune the caches after this many jobs or seconds since the last pruning
+PRUNE_EVERY_JOBS = 100
+PRUNE_INTERVAL_S = 3600
+
+
+class DetectorService:
+    """
+    Long-lived detection resources shared by all jobs.
+    """
+
+    def __init__(self, api_key: str, workers: int = DEFAULT_WORKERS, api_url: str = DEFAULT_API_URL,
+                 cache=None, text_cache=None, chunking=None, chunk_workers: int = DEFAULT_CHUNK_WORKERS,
+                 scheduler: RequestScheduler = None, cache_max_age: float = DEFAULT_MAX_AGE_DAYS,
+                 cache_max_mb: float = DEFAULT_MAX_MB):
+        window_workers = max(1, chunk_workers) if chunking else 0
+        self.api_key = api_key
+        self.api_url = api_url
+        self.cache = cache
+        self.text_cache = text_cache
+        self.cache_max_age = cache_max_age
+        self.cache_max_mb = cache_max_mb
+        self.chunking = chunking
+        self.scheduler = scheduler or RequestScheduler(max_concurrency=workers + window_workers)
+        self.session = make_session(api_key, pool_size=workers + window_workers)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        # Windows are scored on their own pool, as in AI_detect.iter_results()
+        self.window_pool = ThreadPoolExecutor(max_workers=window_workers) if chunking else None
+        self.started = time.time()
+        self.jobs = 0
+        self.files = 0
+        self.evicted = 0
+        self._pruned_jobs = 0
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        text_extraction.preload()
+
+    def analyze(self, items: list) -> dict:
+        """
+        Results (in input order) and errors for the files named by `items`.
+        """
+        paths = list(iter_inputs(items))
+        futures, errors = [], []
+        for path in paths:
+            if not os.path.isfile(path):
+                errors.append({"path": path, "error": "File not found"})
+                continue
+            futures.append((path, self.pool.submit(
+                analyze_file, path, self.api_key, self.session, self.api_url, self.cache, self.text_cache,
+                self.chunking, self.window_pool, self.scheduler,
+            )))
+        results = []
+        for path, future in futures:
+            try:
+                results.append({**future.result(), "path": os.path.abspath(path)})
+            except Exception as e:
+                errors.append({"path": path, "error": str(e)})
+        with self._lock:
+            self.jobs += 1
+            self.files += len(paths)
+            prune_due = (self.jobs - self._pruned_jobs >= PRUNE_EVERY_JOBS
+                         or time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_S)
+            if prune_due:
+                self._pruned_jobs = self.jobs
+                self._pruned_at = time.monotonic()
+        if prune_due:
+            self.prune()
+        return {"analysis": results, "errors": errors}
+
+    def prune(self) -> int:
+        """
+        Evict stale and least recently used cache entries; returns how many.
+        """
+        if self.cache is None:
+            return 0
+        evicted = (self.cache.prune(self.cache_max_age, self.cache_max_mb)
+                   + self.text_cache.prune(self.cache_max_age, self.cache_max_mb))
+        with self._lock:
+            self.evicted += evicted
+        return evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"uptime_s": round(time.time() - self.started, 1), "jobs": self.jobs, "files": self.files}
+            evicted = self.evicted
+        if self.cache is not None:
+            stats["cache"] = {**self.cache.stats(), "extraction": self.text_cache.stats(), "evicted": evicted}
+        stats["requests"] = self.scheduler.stats()
+        return stats
+
+    def close(self):
+        self.pool.shutdown()
+        if self.window_pool is not None:
+            self.window_pool.shutdown()
+        self.session.close()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    service: DetectorService = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.service.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/analyze":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            job = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        files = job.get("files") if isinstance(job, dict) else None
+        if not isinstance(files, list) or not all(isinstance(f, str) for f in files):
+            self._send_json(400, {"error": "expected {\"files\": [paths]}"})
+            return
+        self._send_json(200, self.service.analyze(files))
+
+
+def make_server(service: DetectorService, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    An HTTP server for `service` bound to (host, port); port 0 picks a free
+    port (see server.server_address). Call serve_forever() to run it.
+    """
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(service: DetectorService, host: str = "127.0.0.1", port: int = 8770):
+    """
+    Run the service until interrupted or terminated (SIGTERM), then print
+    its stats to stderr.
+    """
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    server = make_server(service, host, port)
+    host, port = server.server_address[:2]
+    print(f"AI detector service listening on http://{host}:{port}/analyze", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(service.stats()), file=sys.stderr)
+        service.close()
@@ -0,0 +1,181 @@
+# detector_stub_server.py
+
+"""
+Local stub of the completions endpoint used by AI_detect.py, for testing.
+
+Answers every POST with a completions-shaped response whose "</s>" log
+probability is derived from a hash of the prompt, so the same text always
+gets the same verdict. Supports HTTP/1.1 keep-alive; GET /stats returns the
+number of requests and of client connections served, which shows whether
+connections are being reused.
+
+To exercise retries and rate limiting, --max-rps answers 429 (with a
+Retry-After header) to requests beyond that many per second, and
+--error-rate answers that fraction of requests with 503.
+
+    python detector_stub_server.py --port 8765 --latency 0.2 --max-rps 5
+    python AI_detect.py --api-url http://127.0.0.1:8765/v1/completions notes/*.pdf
+"""
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    """
+    Request/connection counters and injected-failure settings shared by the
+    handler threads.
+    """
+
+    def __init__(self, latency: float = 0.0, max_rps: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.max_rps = max_rps
+        self.error_rate = error_rate
+        self.requests = 0
+        self.connections = 0
+        self.throttled = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self._allowance = max_rps
+        self._updated = time.monotonic()
+
+    def admit(self) -> bool:
+        """
+        Whether a request fits within max_rps (a one-second token bucket).
+        """
+        if not self.max_rps:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._allowance = min(self.max_rps, self._allowance + (now - self._updated) * self.max_rps)
+            self._updated = now
+            if self._allowance >= 1:
+                self._allowance -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"requests": self.requests, "connections": self.connections,
+                    "throttled": self.throttled, "errors": self.errors}
+
+
+def stub_logprob(prompt: str) -> float:
+    """
+    Deterministic "</s>" log probability in [log(0.01), log(0.99)] for a prompt.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    prob = 0.01 + 0.98 * int.from_bytes(digest[:4], "big") / 2 ** 32
+    return math.log(prob)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    state: StubState = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+        with self.state.lock:
+            self.state.requests += 1
+        if not self.state.admit():
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                            {"Retry-After": "1"})
+            return
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            with self.state.lock:
+                self.state.errors += 1
+            self._send_json(503, {"error": {"message": "Service unavailable"}})
+            return
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        prompt = str(payload.get("prompt", ""))
+        self._send_json(200, {
+            "object": "text_completion",
+            "model": payload.get("model"),
+            "choices": [{
+                "text": "</s>",
+                "index": 0,
+                "logprobs": {"top_logprobs": [{"</s>": stub_logprob(prompt)}]},
+                "finish_reason": "length",
+            }],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 1},
+        })
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                max_rps: float = 0.0, error_rate: float = 0.0) -> ThreadingHTTPServer:
+    """
+    A stub server bound to (host, port); port 0 picks a free port
+    (see server.server_address). Call serve_forever() to run it.
+    """
+    state = StubState(latency, max_rps, error_rate)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a local stub of the AI detection completions endpoint."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each answer.")
+    parser.add_argument("--max-rps", type=float, default=0.0,
+                        help="Answer 429 to requests beyond this many per second (0: no limit).")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.max_rps, args.error_rate)
+    host, port = server.server_address[:2]
+    print(f"Stub detector listening on http://{host}:{port}/v1/completions", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.state.stats()), file=sys.stderr)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+On-demand export of dashboard results to CSV, XLSX or Parquet.
+
+Files are written in row chunks straight to disk (CSV chunk by chunk, XLSX
+through openpyxl's write-only mode) so an export of the whole archive never
+holds more than one chunk of formatted output in memory. Finished files are
+kept in a small on-disk cache keyed by the caller's selection, so repeated
+downloads of the same selection are served without rebuilding them.
+"""
+import os
+import hashlib
+import tempfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+
+CHUNK_SIZE = 10000
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "uop_dashboard_exports")
+# Maximum number of finished exports kept on disk
+MAX_CACHED_EXPORTS = 32
+
+# Format label -> (file extension, MIME type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel (.xlsx)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def write_csv(df: pd.DataFrame, path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Write the frame as UTF-8 CSV, one chunk of rows at a time.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        df.iloc[:0].to_csv(f, index=False)
+        for start in range(0, len(df), chunk_size):
+            df.iloc[start:start + chunk_size].to_csv(f, header=False, index=False)
+
+
+def write_xlsx(df: pd.DataFrame, path: str, sheet_name: str = "Data", chunk_size: int = CHUNK_SIZE):
+    """
+    Write the frame as an Excel workbook using openpyxl's write-only mode,
+    which streams rows to disk instead of building the sheet in memory.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in df.columns])
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+def write_parquet(df: pd.DataFrame, path: str):
+    """
+    Write the frame as Parquet (requires pyarrow).
+    """
+    df.to_parquet(path, engine="pyarrow", index=False)
+
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+
+def cache_path(key, fmt: str) -> str:
+    """
+    Path of the cached export for a selection key and format label.
+    """
+    ext = FORMATS[fmt][0]
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.{ext}")
+
+
+def _mtime(path: str):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None  # removed by another session meanwhile
+
+
+def _prune(cache_dir: str, keep: int):
+    files = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if not f.endswith(".tmp")]
+    files = [(mtime, path) for path in files if (mtime := _mtime(path)) is not None]
+    files.sort(reverse=True)
+    for _, path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def cached_export(key, fmt: str, make_frame) -> str:
+    """
+    Return the path of the export for `key` in format `fmt`, building it
+    with `make_frame()` only if it is not already cached.
+
+    Sessions are threads of one process, so each build writes to its own
+    temporary file; concurrent builds of the same selection each swap in a
+    complete file.
+    """
+    path = cache_path(key, fmt)
+    try:
+        os.utime(path)  # mark as recently used
+        return path
+    except FileNotFoundError:
+        pass
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    ext = FORMATS[fmt][0]
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        WRITERS[ext](make_frame(), tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)  # the build failed part-way
+    _prune(CACHE_DIR, MAX_CACHED_EXPORTS)
+    return path
@@ -0,0 +1,147 @@
+"""
+Inverted index over the dashboard's sidebar filter columns.
+
+Each filter column (Academic Year, Semester, Performance Type, Composer,
+Performer) is factorized once per dataset load into integer codes plus, for
+every distinct value, the sorted row positions holding it. A filter selection
+is then answered by taking the position list of the most selective criterion
+and checking the remaining criteria with code lookups, so the cost follows the
+number of matching rows instead of the frame length times the number of
+criteria.
+"""
+import numpy as np
+import pandas as pd
+
+
+class Dimension:
+    """
+    Integer codes and per-value row positions for one filter column.
+    """
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values, sort=True)
+        self.codes = codes.astype(np.int32)   # -1 for missing values
+        self.values = list(uniques)           # distinct values, sorted
+        self.lookup = {v: i for i, v in enumerate(self.values)}
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        # Stable sort keeps positions ascending within each value; missing
+        # values (code -1) sort first and are skipped
+        n_missing = len(codes) - int(counts.sum())
+        self.order = np.argsort(codes, kind="stable")[n_missing:]
+
+    def value_counts(self) -> dict:
+        """
+        Number of rows holding each distinct value.
+        """
+        return dict(zip(self.values, np.diff(self.offsets).tolist()))
+
+    def codes_of(self, values):
+        return [self.lookup[v] for v in values if v in self.lookup]
+
+    def count(self, values) -> int:
+        """
+        Number of rows holding any of the values.
+        """
+        return int(sum(self.offsets[c + 1] - self.offsets[c] for c in self.codes_of(values)))
+
+    def positions(self, values) -> np.ndarray:
+        """
+        Sorted row positions holding any of the values.
+        """
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in self.codes_of(values)]
+        if not parts:
+            return np.empty(0, dtype=self.order.dtype)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def contains(self, rows: np.ndarray, values) -> np.ndarray:
+        """
+        Boolean array telling which of the given rows hold any of the values.
+        """
+        # One slot per code plus a trailing False slot that code -1 lands on
+        allowed = np.zeros(len(self.lookup) + 1, dtype=bool)
+        allowed[self.codes_of(values)] = True
+        return allowed[self.codes[rows]]
+
+
+class _Criterion:
+    """
+    A union of value sets over one or more dimensions (e.g. AY OR Semester).
+    """
+
+    def __init__(self, terms):
+        self.terms = [(dim, list(values)) for dim, values in terms]
+
+    def count(self) -> int:
+        # Upper bound when terms overlap; only used to pick the driving criterion
+        return sum(dim.count(values) for dim, values in self.terms)
+
+    def positions(self) -> np.ndarray:
+        parts = [dim.positions(values) for dim, values in self.terms]
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+    def contains(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(rows), dtype=bool)
+        for dim, values in self.terms:
+            mask |= dim.contains(rows, values)
+        return mask
+
+
+class FilterIndex:
+    """
+    Inverted index answering the dashboard's sidebar filter logic:
+    (Academic Year OR Semester) AND Performance Type AND Composer AND Performer.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: dict):
+        """
+        `columns` maps the roles 'academic_year', 'semester', 'perf_type',
+        'composer' and 'performer' to column names (or None if absent).
+        """
+        self.n_rows = len(df)
+        self.dims = {
+            role: Dimension(df[col])
+            for role, col in columns.items()
+            if col and role in ("academic_year", "semester", "perf_type", "composer", "performer")
+        }
+
+    def options(self, role) -> list:
+        """
+        Sorted distinct values of a filter column, or [] if it is absent.
+        """
+        dim = self.dims.get(role)
+        return list(dim.values) if dim else []
+
+    def select(self, academic_years, semesters, perf_types, composer=None, performer=None) -> np.ndarray:
+        """
+        Sorted row positions matching the selection.
+
+        A missing Academic Year or Semester column matches every row, as does
+        an empty Performance Type selection or a composer/performer of None.
+        """
+        criteria = []
+        ay_dim = self.dims.get("academic_year")
+        sem_dim = self.dims.get("semester")
+        if ay_dim and sem_dim:
+            criteria.append(_Criterion([(ay_dim, academic_years), (sem_dim, semesters)]))
+        if perf_types and "perf_type" in self.dims:
+            criteria.append(_Criterion([(self.dims["perf_type"], perf_types)]))
+        if composer is not None and "composer" in self.dims:
+            criteria.append(_Criterion([(self.dims["composer"], [composer])]))
+        if performer is not None and "performer" in self.dims:
+            criteria.append(_Criterion([(self.dims["performer"], [performer])]))
+
+        if not criteria:
+            return np.arange(self.n_rows)
+        # Drive from the most selective criterion, then check the rest per row
+        criteria.sort(key=lambda c: c.count())
+        rows = criteria[0].positions()
+        for criterion in criteria[1:]:
+            if not len(rows):
+                break
+            rows = rows[criterion.contains(rows)]
+        return rows
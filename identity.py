@@ -0,0 +1,148 @@
+"""
+Integer identities for composers, performers and works.
+
+Names in the archive vary in spelling ("J.S. Bach" / "J. S. Bach", missing
+accents) and titles carry year suffixes ("(1968)") and excerpt markers
+("Excerpts from ..."). This module reduces each to a normalized key and
+assigns it a compact integer id, stored with the data, so distinct counts are
+integer operations that also treat spelling variants as one composer, performer
+or work.
+
+Composers are keyed by the curated "Last, First" column (Ugly) when present,
+falling back to the display name, so display-name variants that share a sort
+name are reconciled. Works are keyed by (composer id, normalized title).
+
+Ids are dense and stable across incremental refreshes: keys already in the
+store keep their id and new keys are numbered after the existing ones.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from name_search import normalize
+
+
+COMPOSER_ID = "composer_id"
+PERFORMER_ID = "performer_id"
+WORK_ID = "work_id"
+ID_COLUMNS = [COMPOSER_ID, PERFORMER_ID, WORK_ID]
+
+_PUNCT = re.compile(r"[^\w\s,]+")
+_SPACES = re.compile(r"\s+")
+# Parenthesized dates: (1968), (c. 1720), (1949, 2005), (2011/2019), (1950-51)
+_YEAR_GROUP = re.compile(r"\(\s*(?:c\.?\s*)?\d{4}[\d\s,;/\-–]*\)")
+# Bare trailing dates: "... Gretel 1893; 1981"
+_TRAILING_YEARS = re.compile(r"\s\d{4}(?:\s*[,;/\-–]\s*\d{2,4})*\s*$")
+# Excerpt markers: "Excerpts from X", "Selections from X", "X (excerpts)"
+_EXCERPT_PREFIX = re.compile(r"^(?:excerpts?|selections?)\s+from\s+")
+_EXCERPT_SUFFIX = re.compile(r"\((?:excerpts?|selections?|abridged)\)")
+
+
+def _squash(text: str) -> str:
+    text = _PUNCT.sub(" ", text)
+    return _SPACES.sub(" ", text).strip(" ,")
+
+
+def name_key(name) -> str:
+    """
+    Normalized key of a person's name: accents, case, punctuation and
+    parenthetical notes such as class years are ignored.
+    """
+    text = re.sub(r"\([^)]*\)", " ", normalize(name))
+    # "J.S. Bach" and "J. S. Bach" both become "j s bach"
+    return _squash(text.replace(".", " "))
+
+
+def title_key(title) -> str:
+    """
+    Normalized key of a work title, without dates or excerpt markers.
+    """
+    text = normalize(title)
+    text = _YEAR_GROUP.sub(" ", text)
+    text = _EXCERPT_SUFFIX.sub(" ", text)
+    text = _TRAILING_YEARS.sub(" ", text)
+    text = _EXCERPT_PREFIX.sub("", _squash(text))
+    return _squash(text)
+
+
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    """
+    Apply `func` once per distinct non-missing value.
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([func(v) for v in uniques] + [None], dtype=object)
+    keys = mapped[codes]  # code -1 (missing) picks the trailing None
+    keys[keys == ""] = None
+    return pd.Series(keys, index=values.index, dtype=object)
+
+
+def identity_keys(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """
+    Normalized composer, performer and work keys for each row (None if missing).
+    """
+    keys = pd.DataFrame(index=df.index)
+    composer = pd.Series(None, index=df.index, dtype=object)
+    if columns.get('composer_sort'):
+        composer = _map_unique(df[columns['composer_sort']], name_key)
+    if columns.get('composer'):
+        composer = composer.fillna(_map_unique(df[columns['composer']], name_key))
+    keys[COMPOSER_ID] = composer
+    keys[PERFORMER_ID] = (
+        _map_unique(df[columns['performer']], name_key) if columns.get('performer')
+        else pd.Series(None, index=df.index, dtype=object)
+    )
+    if columns.get('piece'):
+        title = _map_unique(df[columns['piece']], title_key)
+        work = composer.fillna("") + "\x1f" + title
+        keys[WORK_ID] = work.where(title.notna(), None)
+    else:
+        keys[WORK_ID] = pd.Series(None, index=df.index, dtype=object)
+    return keys
+
+
+def assign_ids(keys: pd.Series, previous: dict = None) -> np.ndarray:
+    """
+    Dense int32 id per key (-1 where missing), reusing ids from `previous`
+    (key -> id) and numbering new keys, in sorted order, after them.
+    """
+    previous = previous or {}
+    codes, uniques = pd.factorize(keys, sort=True)
+    next_id = max(previous.values(), default=-1) + 1
+    ids = np.empty(len(uniques) + 1, dtype=np.int32)
+    for i, key in enumerate(uniques):
+        if key in previous:
+            ids[i] = previous[key]
+        else:
+            ids[i] = next_id
+            next_id += 1
+    ids[-1] = -1  # code -1 (missing)
+    return ids[codes]
+
+
+def id_tables(df: pd.DataFrame, columns: dict) -> dict:
+    """
+    key -> id mapping of each id column already present in a typed frame.
+    """
+    tables = {}
+    if not all(col in df.columns for col in ID_COLUMNS):
+        return tables
+    keys = identity_keys(df, columns)
+    for col in ID_COLUMNS:
+        valid = df[col].to_numpy() >= 0
+        pairs = pd.DataFrame({"key": keys[col].to_numpy()[valid], "id": df[col].to_numpy()[valid]})
+        tables[col] = dict(pairs.drop_duplicates("key").itertuples(index=False, name=None))
+    return tables
+
+
+def add_ids(df: pd.DataFrame, columns: dict, previous: dict = None) -> pd.DataFrame:
+    """
+    Add (or renumber) the composer, performer and work id columns, keeping
+    the ids in `previous` (as returned by id_tables) stable.
+    """
+    previous = previous or {}
+    keys = identity_keys(df, columns)
+    df = df.copy()
+    for col in ID_COLUMNS:
+        df[col] = assign_ids(keys[col], previous.get(col))
+    return df
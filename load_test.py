@@ -0,0 +1,316 @@
+# load_test.py
+
+"""
+Headless load test for the dashboard.
+
+Starts the app with `streamlit run --server.headless` (or attaches to a
+running server with --url) and connects N concurrent clients to it over
+Streamlit's websocket protocol, as browsers would. Each client clicks through
+the sidebar filters, the distribution view, the composer search and the table
+pages, so every session shares the server's process-wide caches exactly as
+real users do. Reports per-rerun latency percentiles and the server's RSS.
+
+    python load_test.py --sessions 16 --reruns 30
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+
+try:
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+except ImportError:
+    print("Error: 'streamlit' library not installed. Install with 'pip install streamlit'.", file=sys.stderr)
+    sys.exit(1)
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+COMPOSER_QUERIES = ["bach", "brahms", "beeth", "mozart", "dring", "copland", "ba", "sch", "price", "florence"]
+
+# Widget element types the simulated users interact with, and the
+# WidgetState field each one reports its value in
+WIDGET_VALUE_FIELDS = {
+    "checkbox": "bool_value",
+    "selectbox": "string_value",
+    "text_input": "string_value",
+    "number_input": "double_value",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_path: str, port: int) -> subprocess.Popen:
+    """
+    Launch the app in a headless Streamlit server on localhost.
+    """
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", app_path,
+        "--server.headless", "true",
+        "--server.address", "127.0.0.1",
+        "--server.port", str(port),
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    # The app resolves its relative asset and data paths from the cwd
+    return subprocess.Popen(
+        cmd, cwd=os.path.dirname(os.path.abspath(app_path)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+
+def wait_healthy(url: str, server: subprocess.Popen = None, timeout: float = 60):
+    """
+    Block until the server answers its health check.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError("Streamlit server exited:\n" + server.stderr.read().decode(errors="replace"))
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Streamlit server at {url} not healthy after {timeout:g} s")
+
+
+def rss_mb(pid: int) -> dict:
+    """
+    Current and peak resident set size of a process, in MB (None where
+    /proc is unavailable).
+    """
+    current = peak = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return {"current": current, "peak": peak}
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    pos = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[pos]
+
+
+class Session:
+    """
+    One simulated browser tab: a websocket connection, the widgets rendered
+    by the last rerun and the widget values this user has set.
+    """
+
+    def __init__(self, ws, timeout: float):
+        self.ws = ws
+        self.timeout = timeout
+        self.widgets = {}  # id -> (element type, widget proto)
+        self.states = {}   # id -> value, sent with every rerun
+
+    async def rerun(self) -> bool:
+        """
+        Ask the server to rerun the script with the current widget values and
+        collect the rendered widgets. Returns False if the rerun raised.
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for widget_id, value in self.states.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, WIDGET_VALUE_FIELDS[self.widgets[widget_id][0]], value)
+        await self.ws.send(msg.SerializeToString())
+
+        widgets, ok = {}, True
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    ok = False
+                elif element_type in WIDGET_VALUE_FIELDS:
+                    proto = getattr(element, element_type)
+                    widgets[proto.id] = (element_type, proto)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    ok = False
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        # Like the browser, only report values for widgets still on the page
+        self.widgets = widgets
+        self.states = {k: v for k, v in self.states.items() if k in widgets}
+        return ok
+
+    def find(self, element_type: str, label: str):
+        return next(
+            (w for w, (t, proto) in self.widgets.items() if t == element_type and proto.label == label), None
+        )
+
+    def value(self, widget_id):
+        element_type, proto = self.widgets[widget_id]
+        if widget_id in self.states:
+            return self.states[widget_id]
+        if element_type == "selectbox":
+            return proto.options[proto.default] if proto.HasField("default") and proto.options else ""
+        return proto.default
+
+
+def random_action(session: Session, rng: random.Random) -> str:
+    """
+    Apply one random user interaction to the session's widgets; returns its
+    name. Widgets missing from the last render are skipped.
+    """
+    boxes = [w for w, (t, proto) in session.widgets.items() if t == "checkbox" and not proto.disabled]
+    choice = rng.random()
+    if choice < 0.5 and boxes:
+        box = rng.choice(boxes)
+        session.states[box] = not session.value(box)
+        return "toggle " + session.widgets[box][1].label
+    if choice < 0.65:
+        view = session.find("selectbox", "Select distribution view")
+        if view is not None:
+            session.states[view] = rng.choice(list(session.widgets[view][1].options))
+            return "switch view"
+    elif choice < 0.8:
+        composer = session.find("text_input", "Composer")
+        if composer is not None:
+            session.states[composer] = rng.choice(COMPOSER_QUERIES + [""])
+            return "search composer"
+    else:
+        page = session.find("number_input", "Page")
+        if page is not None:
+            proto = session.widgets[page][1]
+            value = session.value(page) + (1 if rng.random() < 0.7 else -1)
+            if proto.has_max:
+                value = min(value, proto.max)
+            if proto.has_min:
+                value = max(value, proto.min)
+            session.states[page] = value
+            return "change page"
+    return "rerun"
+
+
+async def run_session(session_id: int, url: str, reruns: int, seed: int, timeout: float) -> dict:
+    """
+    One simulated user: load the app, then apply `reruns` random interactions.
+    A rerun that raises, times out or loses the connection counts as an error.
+    """
+    rng = random.Random(seed + session_id)
+    latencies, errors = [], 0
+    ws_url = url.replace("http", "ws", 1) + "/_stcore/stream"
+    try:
+        async with websockets.connect(ws_url, subprotocols=["streamlit"], max_size=None) as ws:
+            session = Session(ws, timeout)
+            for i in range(reruns + 1):
+                action = "initial load" if i == 0 else random_action(session, rng)
+                start = time.perf_counter()
+                try:
+                    ok = await asyncio.wait_for(session.rerun(), timeout)
+                except asyncio.TimeoutError:
+                    # The connection is out of step with the server; stop here
+                    errors += 1
+                    break
+                latencies.append((action, time.perf_counter() - start))
+                if not ok:
+                    errors += 1
+    except (OSError, websockets.WebSocketException):
+        errors += 1
+    return {"latencies": latencies, "errors": errors}
+
+
+async def run_sessions(args, url: str) -> list:
+    return await asyncio.gather(*(
+        run_session(i, url, args.reruns, args.seed, args.timeout) for i in range(args.sessions)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent dashboard sessions and report rerun latency and server memory."
+    )
+    parser.add_argument("--sessions", type=int, default=8, help="Number of concurrent sessions.")
+    parser.add_argument("--reruns", type=int, default=20, help="Interactions per session.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the click sequences.")
+    parser.add_argument("--app", default=APP_PATH, help="Path to the Streamlit app script.")
+    parser.add_argument("--url", help="Base URL of an already running dashboard (no server is started).")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, to report its RSS.")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-rerun timeout in seconds.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url.rstrip("/") if args.url else None
+    pid = args.server_pid
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(args.app, port)
+        pid = server.pid
+    try:
+        wait_healthy(url, server)
+        rss_before = rss_mb(pid) if pid else None
+        started = time.perf_counter()
+        results = asyncio.run(run_sessions(args, url))
+        wall = time.perf_counter() - started
+        rss_after = rss_mb(pid) if pid else None
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    reruns = sorted(t for r in results for action, t in r["latencies"] if action != "initial load")
+    loads = sorted(t for r in results for action, t in r["latencies"] if action == "initial load")
+    report = {
+        "sessions": args.sessions,
+        "reruns": len(reruns),
+        "errors": sum(r["errors"] for r in results),
+        "wall_seconds": round(wall, 3),
+        "rerun_ms": {
+            f"p{q}": round(percentile(reruns, q) * 1000, 1) for q in (50, 90, 95, 99)
+        } | {"max": round(reruns[-1] * 1000, 1) if reruns else None},
+        "initial_load_ms": {
+            "p50": round(percentile(loads, 50) * 1000, 1),
+            "max": round(loads[-1] * 1000, 1) if loads else None,
+        },
+        "server_rss_mb": {"before": rss_before, "after": rss_after},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['sessions']} sessions, {report['reruns']} reruns, {report['errors']} errors, "
+              f"{report['wall_seconds']} s wall")
+        print("Rerun latency (ms): " + ", ".join(f"{k} {v}" for k, v in report["rerun_ms"].items()))
+        print("Initial load (ms): " + ", ".join(f"{k} {v}" for k, v in report["initial_load_ms"].items()))
+        if rss_after and rss_after["current"] is not None:
+            print(f"Server RSS (MB): {rss_before['current']:.0f} before sessions, "
+                  f"{rss_after['current']:.0f} after, {rss_after['peak']:.0f} peak")
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
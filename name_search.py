@@ -0,0 +1,106 @@
+"""
+Type-ahead search over composer and performer names.
+
+Names (plus aliases such as the archive's "Last, First" composer spelling)
+are normalized once per dataset load (case- and accent-insensitive) and
+indexed by character trigrams and by word prefixes. A query is answered from
+the candidate set of its rarest trigram, or a prefix range for one- and
+two-letter queries, and only the top-k ranked names are returned, so the
+sidebar never has to ship every distinct name to the browser.
+"""
+import re
+import bisect
+import unicodedata
+from collections import defaultdict
+
+
+_TOKEN_SPLIT = re.compile(r"[\s,.;:/()\-]+")
+
+
+def normalize(text) -> str:
+    """
+    Case- and accent-insensitive form of a name.
+    """
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameSearch:
+    """
+    Ranked substring/prefix search over a fixed set of names.
+    """
+
+    def __init__(self, names, aliases=(), weights=None):
+        """
+        `names` are the values returned by searches; `aliases` is an iterable
+        of (alias, name) pairs that also match `name`; `weights` maps names to
+        a popularity score (e.g. performance count) used to break ties.
+        """
+        self.names = list(names)
+        ids = {name: i for i, name in enumerate(self.names)}
+        weights = weights or {}
+        self.weights = [weights.get(name, 0) for name in self.names]
+
+        # Searchable keys: each name plus its aliases, as (normalized text, name id)
+        self.keys = [(normalize(name), i) for i, name in enumerate(self.names)]
+        seen = set(self.keys)
+        for alias, name in aliases:
+            if name in ids:
+                entry = (normalize(alias), ids[name])
+                if entry[0] and entry not in seen:
+                    seen.add(entry)
+                    self.keys.append(entry)
+
+        self.grams = defaultdict(list)
+        tokens = []
+        for key_id, (key, _) in enumerate(self.keys):
+            for gram in _trigrams(key):
+                self.grams[gram].append(key_id)
+            tokens.extend((tok, key_id) for tok in _TOKEN_SPLIT.split(key) if tok)
+        tokens.sort()
+        self.tokens = [tok for tok, _ in tokens]
+        self.token_keys = [key_id for _, key_id in tokens]
+
+    def _candidates(self, term: str):
+        if len(term) >= 3:
+            postings = [self.grams.get(g, ()) for g in _trigrams(term)]
+            return min(postings, key=len)
+        # Short terms: every key with a word starting with the term
+        lo = bisect.bisect_left(self.tokens, term)
+        hi = bisect.bisect_left(self.tokens, term + "￿")
+        return self.token_keys[lo:hi]
+
+    def search(self, query, k: int = 20) -> list:
+        """
+        Up to `k` names matching every word of the query, best first:
+        exact match, then names starting with the query, then names with
+        words starting with each query word, then any substring match;
+        ties go to the more frequent name.
+        """
+        q = normalize(query)
+        terms = [t for t in _TOKEN_SPLIT.split(q) if t]
+        if not terms:
+            return []
+        driver = max(terms, key=len)
+
+        best = {}
+        for key_id in set(self._candidates(driver)):
+            key, name_id = self.keys[key_id]
+            if not all(t in key for t in terms):
+                continue
+            if key == q:
+                rank = 0
+            elif key.startswith(q):
+                rank = 1
+            else:
+                words = _TOKEN_SPLIT.split(key)
+                rank = 2 if all(any(w.startswith(t) for w in words) for t in terms) else 3
+            if rank < best.get(name_id, 4):
+                best[name_id] = rank
+
+        ranked = sorted(best, key=lambda i: (best[i], -self.weights[i], self.names[i]))
+        return [self.names[i] for i in ranked[:k]]
@@ -0,0 +1,147 @@
+"""
+Per-rerun stage timing for the dashboard.
+
+The app script marks the start of each stage (data load, sidebar, filtering,
+aggregation, charts, table, ...) on a RerunProfiler; each stage records its
+wall time, the number of rows it produced and the change in process memory.
+The timings are shown in an opt-in sidebar panel (``?profile=1`` in the URL or
+UOP_PROFILE=1 in the environment) and appended as one JSON line per rerun to
+the log file named by UOP_PROFILE_LOG, so slow production reruns can be
+analyzed afterwards. With UOP_PROFILE_SLOW_MS set, only reruns at least that
+slow are logged.
+
+Memory is the resident set size of the whole server process, so with
+concurrent sessions a stage's delta also includes the other sessions' work.
+"""
+import os
+import json
+import time
+import resource
+import threading
+
+
+PANEL_ENV = "UOP_PROFILE"
+PANEL_QUERY_PARAM = "profile"
+LOG_ENV = "UOP_PROFILE_LOG"
+SLOW_MS_ENV = "UOP_PROFILE_SLOW_MS"
+
+_log_lock = threading.Lock()
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MB (peak RSS where /proc
+    is unavailable).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def panel_enabled(query_params=None) -> bool:
+    """
+    Whether the profiling panel was requested by environment or query string.
+    """
+    if _truthy(os.environ.get(PANEL_ENV, "")):
+        return True
+    return bool(query_params) and _truthy(query_params.get(PANEL_QUERY_PARAM, ""))
+
+
+class RerunProfiler:
+    """
+    Wall time, row count and memory delta of each stage of one script run.
+
+    Stages are consecutive: start() ends the current stage and begins the
+    next, and finish() ends the last one. When neither the panel nor the log
+    is enabled only the wall times are taken.
+    """
+
+    def __init__(self, panel: bool = False, log_path: str = None, slow_ms: float = 0.0, context: dict = None):
+        self.panel = panel
+        self.log_path = log_path
+        self.slow_ms = slow_ms
+        self.context = dict(context or {})
+        self.track_memory = panel or bool(log_path)
+        self.stages = []
+        self._current = None
+        self._started = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, query_params=None, context: dict = None) -> "RerunProfiler":
+        """
+        A profiler configured from the environment and the page's query string.
+        """
+        return cls(
+            panel=panel_enabled(query_params),
+            log_path=os.environ.get(LOG_ENV) or None,
+            slow_ms=float(os.environ.get(SLOW_MS_ENV, 0) or 0),
+            context=context,
+        )
+
+    def start(self, name: str):
+        """
+        End the current stage (if any) and start timing `name`.
+        """
+        self._end_current()
+        self._current = {
+            "stage": name,
+            "t0": time.perf_counter(),
+            "rss0": rss_mb() if self.track_memory else None,
+            "rows": None,
+        }
+
+    def rows(self, n: int):
+        """
+        Record the number of rows the current stage produced.
+        """
+        if self._current is not None:
+            self._current["rows"] = int(n)
+
+    def _end_current(self):
+        if self._current is None:
+            return
+        cur, self._current = self._current, None
+        self.stages.append({
+            "stage": cur["stage"],
+            "ms": round((time.perf_counter() - cur["t0"]) * 1000, 2),
+            "rows": cur["rows"],
+            "rss_delta_mb": round(rss_mb() - cur["rss0"], 2) if cur["rss0"] is not None else None,
+        })
+
+    def finish(self) -> dict:
+        """
+        End the last stage and return this rerun's record; it is also
+        appended to the log file when logging is enabled and the rerun was
+        slow enough.
+        """
+        self._end_current()
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2),
+            "rss_mb": round(rss_mb(), 1) if self.track_memory else None,
+            **self.context,
+            "stages": self.stages,
+        }
+        if self.log_path and record["total_ms"] >= self.slow_ms:
+            self._write(record)
+        return record
+
+    def _write(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        try:
+            # One write per rerun under a lock, so concurrent sessions never
+            # interleave partial lines
+            with _log_lock, open(self.log_path, "a") as f:
+                f.write(line)
+        except OSError:
+            # Profiling must never break the page
+            pass
@@ -0,0 +1,181 @@
+"""
+Headless query engine for the LongForm archive.
+
+The dashboard's filtering, aggregation and table logic, usable without
+Streamlit: a FilterSpec (the sidebar selection) goes in, the matching rows in
+display order and their demographic summary come out. app.py answers every
+rerun through one shared QueryEngine, and reports.py uses the same engine to
+generate report batches from the command line.
+
+Filter semantics match the sidebar: (Academic Year OR Semester) AND
+Performance Type AND Composer AND Performer, where an empty Performance Type
+selection and a composer/performer of None match every row.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import aggregates
+from filter_index import FilterIndex
+
+
+# Table columns by role, in display order, with their display names
+DISPLAY_ROLES = [
+    ("semester", "Semester"),
+    ("date_display", "Date"),
+    ("performer", "Performer"),
+    ("instrument", "Instrument"),
+    ("composer", "Composer"),
+    ("piece", "Piece"),
+]
+
+
+class FilterSpec(NamedTuple):
+    """
+    A sidebar selection. Build with FilterSpec.of() so equal selections are
+    equal (and hash alike) whatever order their values were picked in.
+    """
+    academic_years: tuple = ()
+    semesters: tuple = ()
+    perf_types: tuple = ()
+    composer: Optional[str] = None
+    performer: Optional[str] = None
+
+    @classmethod
+    def of(cls, academic_years=(), semesters=(), perf_types=(), composer=None, performer=None) -> "FilterSpec":
+        return cls(
+            tuple(sorted(set(academic_years))),
+            tuple(sorted(set(semesters))),
+            tuple(sorted(set(perf_types))),
+            composer,
+            performer,
+        )
+
+
+def search_mask(frame: pd.DataFrame, columns, text: str) -> np.ndarray:
+    """
+    Rows where any of the columns contains `text` (case-insensitive).
+    Categorical columns are matched once per distinct value, not per row.
+    """
+    mask = np.zeros(len(frame), dtype=bool)
+    for col in columns:
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            cats = values.cat.categories
+            hits = cats[cats.astype(str).str.contains(text, case=False, regex=False)]
+            mask |= values.isin(hits).to_numpy()
+        else:
+            mask |= values.astype(str).str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def flatten_summary(summary: dict) -> dict:
+    """
+    One flat record of a summary's counts (e.g. for a CSV row):
+    total, every gender/ethnicity/group/status count, group x status
+    counts, distinct works and performers.
+    """
+    record = {"total": summary["total"]}
+    for part in ("gender", "ethnicity", "groups", "status"):
+        record.update(summary[part])
+    for row in summary["group_status"].itertuples(index=False):
+        record[f"{row.Group} {row.Status}"] = row.Count
+    record["works"] = summary.get("works")
+    record["performers"] = summary.get("performers")
+    return record
+
+
+class QueryEngine:
+    """
+    Filtering and aggregation over one typed LongForm frame.
+
+    The filter index and the demographic cube are built once; queries never
+    modify the frame, so one engine can be shared between sessions or threads.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.columns = data_store.detect_columns(df.columns)
+        self.index = FilterIndex(df, self.columns)
+        self.cube = aggregates.DemographicCube(df, self.columns, self.index)
+
+        # Display dates (e.g. Jan. 1, 2025) are formatted at ingest; sorting
+        # by them uses the real datetime column
+        roles = dict(self.columns)
+        roles["date_display"] = data_store.DATE_DISPLAY_COLUMN if data_store.DATE_DISPLAY_COLUMN in df.columns else None
+        self.display_columns = [roles[role] for role, _ in DISPLAY_ROLES if roles[role]]
+        self.display_names = {roles[role]: name for role, name in DISPLAY_ROLES if roles[role]}
+
+    @classmethod
+    def load(cls, source: str = data_store.SOURCE_PATH, store: str = data_store.STORE_PATH) -> "QueryEngine":
+        """
+        An engine over the typed dataset (see data_store.load_dataset).
+        """
+        return cls(data_store.load_dataset(source, store))
+
+    def options(self, role) -> list:
+        """
+        Sorted distinct values of a filter column ('academic_year',
+        'semester', 'perf_type', 'composer' or 'performer').
+        """
+        return self.index.options(role)
+
+    def rows(self, spec: FilterSpec) -> np.ndarray:
+        """
+        Ascending positions of the rows matching the selection.
+        """
+        return self.index.select(spec.academic_years, spec.semesters, spec.perf_types,
+                                 composer=spec.composer, performer=spec.performer)
+
+    def frame(self, spec: FilterSpec) -> pd.DataFrame:
+        """
+        The matching rows, in display order.
+        """
+        # The store is already in display order (Academic Year, Semester
+        # (Fall, Spring), then Index; see data_store.sort_canonical) and the
+        # row positions are ascending, so the subset needs no re-sorting
+        return self.df.iloc[self.rows(spec)]
+
+    def summary(self, spec: FilterSpec, frame: pd.DataFrame = None) -> dict:
+        """
+        Demographic breakdowns (see aggregates.summarize) plus distinct works
+        and performers of the matching rows. `frame` may pass in the already
+        filtered rows.
+        """
+        # Without a composer or performer filter, the summary is the sum of
+        # pre-aggregated cube cells
+        if spec.composer is None and spec.performer is None:
+            return self.cube.summary(spec.academic_years, spec.semesters, spec.perf_types)
+        if frame is None:
+            frame = self.frame(spec)
+        summary = aggregates.demographics(frame, self.columns['comp_gen'], self.columns['comp_status'])
+        summary.update(aggregates.distinct_counts(
+            frame, self.columns['composer'], self.columns['piece'], self.columns['performer']
+        ))
+        return summary
+
+    def query(self, spec: FilterSpec):
+        """
+        The matching rows and their summary.
+        """
+        frame = self.frame(spec)
+        return frame, self.summary(spec, frame)
+
+    def table(self, spec: FilterSpec, search: str = "", sort_by=None, descending: bool = False,
+              frame: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        The Performance Details table: display columns under their display
+        names, rows containing `search` in any of them, sorted by the column
+        `sort_by` (None keeps display order). `frame` may pass in the already
+        filtered rows.
+        """
+        view = self.frame(spec) if frame is None else frame
+        if search:
+            view = view[search_mask(view, self.display_columns, search)]
+        if sort_by:
+            # Sort dates chronologically, not by their formatted text
+            sort_col = self.columns['date'] if sort_by == data_store.DATE_DISPLAY_COLUMN else sort_by
+            view = view.sort_values(by=sort_col, ascending=not descending, kind="stable", na_position="last")
+        return view[self.display_columns].rename(columns=self.display_names)
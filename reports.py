@@ -0,0 +1,166 @@
+# reports.py
+
+"""
+Generate the per-year and per-semester demographic report batch.
+
+One report is produced for every Academic Year and every Semester, each for
+all performance types together and for each Performance Type on its own,
+using the same query engine as the dashboard (so every number matches what
+the sidebar shows for that selection). Reports are computed in parallel in a
+process pool; each worker loads the typed store once.
+
+Writes summary.csv (one row per report) and summary.json to the output
+directory, plus, with --rows, the Performance Details table of each report
+under rows/.
+
+    python reports.py -o reports --workers 4 --rows
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import data_store
+from query_engine import QueryEngine, FilterSpec, flatten_summary
+
+
+SCOPES = ["academic_year", "semester"]
+ALL_TYPES = "All"
+
+# Engine of a pool worker (or of the main process with --workers 1)
+_engine = None
+
+
+def _init_worker(source: str, store: str):
+    global _engine
+    _engine = QueryEngine.load(source, store)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_") or "blank"
+
+
+def report_jobs(engine: QueryEngine, scopes=SCOPES) -> list:
+    """
+    (scope, value, performance type) of every report, in output order.
+    """
+    perf_types = [ALL_TYPES] + engine.options('perf_type')
+    return [
+        (scope, value, perf_type)
+        for scope in scopes
+        for value in engine.options(scope)
+        for perf_type in perf_types
+    ]
+
+
+def job_spec(scope: str, value, perf_type) -> FilterSpec:
+    """
+    The sidebar selection a report corresponds to.
+    """
+    return FilterSpec.of(
+        academic_years=[value] if scope == "academic_year" else [],
+        semesters=[value] if scope == "semester" else [],
+        perf_types=[] if perf_type == ALL_TYPES else [perf_type],
+    )
+
+
+def run_report(job, rows_dir: str = None) -> dict:
+    """
+    The summary record of one report, writing its table to `rows_dir` if given.
+    """
+    scope, value, perf_type = job
+    spec = job_spec(scope, value, perf_type)
+    record = {"scope": scope, "value": value, "perf_type": perf_type}
+    if rows_dir:
+        frame, summary = _engine.query(spec)
+        path = os.path.join(rows_dir, f"{scope}_{_slug(value)}_{_slug(perf_type)}.csv")
+        _engine.table(spec, frame=frame).to_csv(path, index=False)
+        record["rows_file"] = os.path.relpath(path, os.path.dirname(rows_dir))
+    else:
+        summary = _engine.summary(spec)
+    record.update(flatten_summary(summary))
+    return record
+
+
+def _run_batch(jobs, rows_dir: str = None) -> list:
+    return [run_report(job, rows_dir) for job in jobs]
+
+
+def generate_reports(source: str, store: str, output_dir: str, workers: int, scopes=SCOPES,
+                     with_rows: bool = False) -> list:
+    """
+    Compute every report and write them to `output_dir`; returns the records.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows_dir = os.path.join(output_dir, "rows") if with_rows else None
+    if rows_dir:
+        os.makedirs(rows_dir, exist_ok=True)
+
+    # Also brings the store up to date once, before any worker reads it
+    _init_worker(source, store)
+    jobs = report_jobs(_engine, scopes)
+
+    if workers <= 1:
+        records = _run_batch(jobs, rows_dir)
+    else:
+        # A few batches per worker: each report is cheap, so per-task
+        # overhead would otherwise dominate
+        n_batches = min(len(jobs), workers * 4) or 1
+        batches = [jobs[i::n_batches] for i in range(n_batches)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(source, store)) as pool:
+            results = list(pool.map(_run_batch, batches, [rows_dir] * len(batches)))
+        # Restore output order from the round-robin batches
+        records = [None] * len(jobs)
+        for b, batch_records in enumerate(results):
+            records[b::n_batches] = batch_records
+
+    pd.DataFrame(records).to_csv(os.path.join(output_dir, "summary.csv"), index=False)
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump({"source": source, "reports": records}, f, indent=2, default=str)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate per-year and per-semester demographic reports from the LongForm data."
+    )
+    parser.add_argument(
+        "source",
+        nargs='?',
+        default=data_store.SOURCE_PATH,
+        help="Path to the LongForm CSV or XLSX export."
+    )
+    parser.add_argument("--store", default=data_store.STORE_PATH, help="Path of the typed Parquet store.")
+    parser.add_argument("-o", "--output", default="reports", help="Output directory.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (1 runs in this process)."
+    )
+    parser.add_argument(
+        "--scope",
+        nargs='+',
+        choices=SCOPES,
+        default=SCOPES,
+        help="Which report families to generate."
+    )
+    parser.add_argument("--rows", action="store_true", help="Also write each report's records as CSV.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source) and not os.path.exists(args.store):
+        print(f"Error: source file '{args.source}' not found.", file=sys.stderr)
+        sys.exit(1)
+    started = time.perf_counter()
+    records = generate_reports(args.source, args.store, args.output, args.workers, args.scope, args.rows)
+    print(f"Wrote {len(records)} reports to {args.output} in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
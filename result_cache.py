@@ -0,0 +1,230 @@
+"""
+Persistent caches for AI_detect.py: detection results and extracted text.
+
+Results are stored in a SQLite file keyed by a hash of the exact detection
+request: the extracted text (as the prompt), the model name and every other
+payload parameter, plus the endpoint. An unchanged document, or a duplicate
+of one already analyzed, is answered from the cache without calling the API;
+within a run, duplicates of a document whose request is still in flight wait
+for that request instead of sending their own.
+
+Extracted text is cached (compressed) by file path, modification time and
+size, so an unchanged file is never parsed twice.
+
+Entries unused for longer than the maximum age are evicted, and the least
+recently used entries are evicted once a cache exceeds its size limit.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ai_detect", "results.sqlite")
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_MB = 64
+
+
+def cache_key(payload: dict, api_url: str = "") -> str:
+    """
+    SHA-256 of the canonical JSON form of a request payload and its endpoint.
+    """
+    canonical = json.dumps({"url": api_url, "payload": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _SQLiteCache:
+    """
+    One thread-safe SQLite table of entries with a key, a byte size and a
+    last-used time, plus hit/miss counters.
+    """
+
+    TABLE = None
+    COLUMNS = None  # column definitions besides key, created, last_used, size
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._con.execute("PRAGMA journal_mode = WAL")
+        self._con.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} (key TEXT PRIMARY KEY, {self.COLUMNS},"
+            " created REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._con.execute(f"CREATE INDEX IF NOT EXISTS {self.TABLE}_last_used ON {self.TABLE} (last_used)")
+        self._con.commit()
+
+    def close(self):
+        with self._lock:
+            self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def prune(self, max_age_days: float = DEFAULT_MAX_AGE_DAYS, max_mb: float = DEFAULT_MAX_MB) -> int:
+        """
+        Evict entries unused for more than `max_age_days`, then the least
+        recently used ones until the cache holds at most `max_mb`.
+        Returns the number of evicted entries.
+        """
+        with self._lock:
+            cur = self._con.execute(f"DELETE FROM {self.TABLE} WHERE last_used < ?",
+                                    (time.time() - max_age_days * 86400,))
+            evicted = cur.rowcount
+            total = self._con.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+            excess = total - max_mb * 1024 * 1024
+            if excess > 0:
+                # Oldest-used first until enough bytes are freed
+                freed, keys = 0, []
+                for key, size in self._con.execute(f"SELECT key, size FROM {self.TABLE} ORDER BY last_used"):
+                    if freed >= excess:
+                        break
+                    keys.append((key,))
+                    freed += size
+                self._con.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", keys)
+                evicted += len(keys)
+            self._con.commit()
+        return evicted
+
+
+class ResultCache(_SQLiteCache):
+    """
+    Detection results keyed by cache_key(); see lookup().
+    """
+
+    TABLE = "results"
+    COLUMNS = "result TEXT NOT NULL"
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        super().__init__(path)
+        self._pending = {}  # key -> Future of a request in flight
+
+    def get(self, key: str):
+        """
+        The cached result for `key`, or None.
+        """
+        with self._lock:
+            return self._read(key)
+
+    def _read(self, key: str):
+        # Caller holds self._lock
+        row = self._con.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._con.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._con.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        data = json.dumps(result)
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, data, now, now, len(key) + len(data)),
+            )
+            self._con.commit()
+
+    def lookup(self, key: str, compute):
+        """
+        The result for `key`: from the cache, from a request already in
+        flight for the same key, or by calling `compute()` and storing what
+        it returns. Failed computations are not cached.
+        """
+        result = self.get(key)
+        with self._lock:
+            if result is None:
+                # Read again under the same lock as the pending check: the
+                # owner of a request may have stored it and stopped being
+                # pending since the read above
+                result = self._read(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                owner = Future()
+                self._pending[key] = owner
+            else:
+                self.hits += 1
+        if pending is not None:
+            return pending.result()
+
+        try:
+            result = compute()
+            # Stored before the request stops being pending, so a duplicate
+            # arriving in between finds one or the other
+            self.put(key, result)
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            owner.set_exception(e)
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+        owner.set_result(result)
+        return result
+
+
+class TextCache(_SQLiteCache):
+    """
+    Extracted text keyed by file path, valid while the file's modification
+    time and size are unchanged.
+    """
+
+    TABLE = "texts"
+    COLUMNS = "mtime_ns INTEGER NOT NULL, file_size INTEGER NOT NULL, text BLOB NOT NULL"
+
+    @staticmethod
+    def _stat(path: str, st: os.stat_result = None):
+        st = st or os.stat(path)
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, path: str):
+        """
+        The cached text of an unchanged file, or None.
+        """
+        key, mtime_ns, size = self._stat(path)
+        with self._lock:
+            row = self._con.execute(
+                "SELECT text FROM texts WHERE key = ? AND mtime_ns = ? AND file_size = ?",
+                (key, mtime_ns, size),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._con.execute("UPDATE texts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._con.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, path: str, text: str, st: os.stat_result = None):
+        """
+        Cache a file's text; `st` is the file's os.stat() from before it was
+        read, so a file changed while being read is not cached as unchanged.
+        """
+        key, mtime_ns, size = self._stat(path, st)
+        data = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, mtime_ns, size, data, now, now, len(key) + len(data)),
+            )
+            self._con.commit()
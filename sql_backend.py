@@ -0,0 +1,254 @@
+# sql_backend.py
+
+"""
+Embedded SQLite database of the typed archive for ad-hoc queries.
+
+The typed dataset is copied into a single-table SQLite file (performances)
+with friendly column names, readable composer demographics (composer_group,
+composer_vital_status) and indexes on the filter columns, so queries the
+sidebar cannot express run inside the database engine:
+
+    SELECT instrument, COUNT(*) AS performances, COUNT(DISTINCT work_id) AS works
+    FROM performances
+    WHERE composer_group = 'BBIA Women' AND composer_vital_status = 'Living'
+      AND perf_type = 'Chamber' AND year >= 2015
+    GROUP BY instrument ORDER BY performances DESC
+
+The database is rebuilt whenever the data it was built from changes.
+Queries run on a read-only connection, one SELECT at a time, with a row
+limit and a time limit.
+
+    python sql_backend.py "SELECT perf_type, COUNT(*) FROM performances GROUP BY 1"
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+
+import pandas as pd
+
+import data_store
+import identity
+import aggregates
+
+
+DB_PATH = "LongForm.sqlite"
+TABLE = "performances"
+# Bump whenever the table layout changes, so existing databases are rebuilt
+DB_VERSION = "1"
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_TIMEOUT = 10.0
+
+# Dataset roles -> SQL column names
+ROLE_COLUMNS = {
+    "semester": "semester",
+    "academic_year": "academic_year",
+    "concert": "concert",
+    "index": "program_index",
+    "performer": "performer",
+    "perf_type": "perf_type",
+    "kind": "performer_type",
+    "instrument": "instrument",
+    "composer": "composer",
+    "composer_sort": "composer_sort",
+    "piece": "piece",
+    "comp_gen": "composer_category",
+    "comp_status": "composer_status",
+}
+# Filter columns that get an index
+INDEXED_COLUMNS = ["semester", "academic_year", "perf_type", "composer", "performer", "year"]
+# Internal store columns not copied to the database
+SKIP_COLUMNS = [data_store.ROW_HASH_COLUMN]
+
+# Statement actions an ad-hoc query may perform
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                    getattr(sqlite3, "SQLITE_RECURSIVE", 33)}
+
+_GROUP_NAMES = {code: name for name, code in aggregates.GROUP_CODES.items()}
+_STATUS_NAMES = {code: name for name, code in aggregates.STATUS_CODES.items()}
+
+
+class QueryError(Exception):
+    """
+    An ad-hoc query was rejected, failed or ran out of time.
+    """
+
+
+def _sql_name(column: str) -> str:
+    return re.sub(r"\W+", "_", str(column).strip().lower()).strip("_") or "column"
+
+
+def sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The typed dataset with SQL column names and SQLite-friendly values.
+    """
+    roles = data_store.detect_columns(df.columns)
+    names = {col: ROLE_COLUMNS[role] for role, col in roles.items() if col and role in ROLE_COLUMNS}
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        if col in SKIP_COLUMNS or col == roles["date"]:
+            continue
+        name = names.get(col) or _sql_name(col)
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object).where(values.notna(), None)
+        out[name] = values
+
+    if roles["date"]:
+        dates = df[roles["date"]]
+        out["date"] = dates.dt.strftime("%Y-%m-%d").where(dates.notna(), None)
+        out["year"] = dates.dt.year.astype("Int16")
+    else:
+        out["year"] = pd.Series(pd.NA, index=df.index, dtype="Int16")
+    out["composer_group"] = (
+        df[roles["comp_gen"]].map(_GROUP_NAMES).astype(object) if roles["comp_gen"] else None
+    )
+    out["composer_vital_status"] = (
+        df[roles["comp_status"]].map(_STATUS_NAMES).astype(object) if roles["comp_status"] else None
+    )
+    out = out.rename(columns={
+        data_store.SORT_RANK_COLUMN: "sort_rank",
+        data_store.DATE_DISPLAY_COLUMN: "date_display",
+    })
+    return out.reset_index(drop=True)
+
+
+def build_database(df: pd.DataFrame, version, path: str = DB_PATH):
+    """
+    Write the dataset to a new SQLite file and swap it in atomically.
+    `version` identifies the data it was built from (see is_current).
+    """
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    try:
+        sql_frame(df).to_sql(TABLE, con, index=False, chunksize=10000)
+        columns = {row[1] for row in con.execute(f"PRAGMA table_info({TABLE})")}
+        for col in INDEXED_COLUMNS + identity.ID_COLUMNS:
+            if col in columns:
+                con.execute(f"CREATE INDEX idx_{col} ON {TABLE} ({col})")
+        con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        con.executemany("INSERT INTO meta VALUES (?, ?)",
+                        [("db_version", DB_VERSION), ("data_version", str(version))])
+        con.commit()
+        con.execute("ANALYZE")
+    finally:
+        con.close()
+    os.replace(tmp, path)
+
+
+def is_current(version, path: str = DB_PATH) -> bool:
+    """
+    Whether the database exists and was built from data `version` with the
+    current layout.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            meta = dict(con.execute("SELECT key, value FROM meta"))
+        finally:
+            con.close()
+    except sqlite3.DatabaseError:
+        return False
+    return meta.get("db_version") == DB_VERSION and meta.get("data_version") == str(version)
+
+
+def ensure_database(df: pd.DataFrame, version, path: str = DB_PATH) -> str:
+    """
+    Path of an up-to-date database, rebuilding it from `df` if needed.
+    """
+    if not is_current(version, path):
+        build_database(df, version, path)
+    return path
+
+
+def schema(path: str = DB_PATH) -> pd.DataFrame:
+    """
+    Column names and SQLite types of the performances table.
+    """
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = con.execute(f"PRAGMA table_info({TABLE})").fetchall()
+    finally:
+        con.close()
+    return pd.DataFrame([(r[1], r[2]) for r in rows], columns=["column", "type"])
+
+
+def run_query(sql: str, path: str = DB_PATH, max_rows: int = DEFAULT_MAX_ROWS,
+              timeout: float = DEFAULT_TIMEOUT):
+    """
+    Run one read-only SELECT; returns (result frame, truncated), where
+    truncated tells whether more than `max_rows` rows were available.
+    Raises QueryError for writes, errors and queries running past `timeout`
+    seconds.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        raise QueryError("Empty query.")
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        con.execute("PRAGMA query_only = ON")
+        # Deny everything but reads (e.g. ATTACH, PRAGMA, temp tables)
+        con.set_authorizer(
+            lambda action, *args: sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+        )
+        deadline = time.monotonic() + timeout
+        # Abort the statement once the deadline passes (checked every 10k VM steps)
+        con.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            cur = con.execute(sql)
+            if cur.description is None:
+                raise QueryError("Only SELECT queries are allowed.")
+            rows = cur.fetchmany(max_rows + 1)
+        except sqlite3.OperationalError as e:
+            if str(e) == "interrupted":
+                raise QueryError(f"Query stopped after the {timeout:g} s time limit.") from e
+            raise QueryError(str(e)) from e
+        except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+            # e.g. writes on the read-only connection, several statements
+            raise QueryError(str(e)) from e
+        columns = [d[0] for d in cur.description]
+    finally:
+        con.close()
+    truncated = len(rows) > max_rows
+    return pd.DataFrame(rows[:max_rows], columns=columns), truncated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a read-only SQL query against the LongForm archive."
+    )
+    parser.add_argument("sql", nargs='?', help="SELECT statement (omit to print the table schema).")
+    parser.add_argument("--source", default=data_store.SOURCE_PATH, help="Path to the LongForm CSV or XLSX export.")
+    parser.add_argument("--store", default=data_store.STORE_PATH, help="Path of the typed Parquet store.")
+    parser.add_argument("--db", default=DB_PATH, help="Path of the SQLite database.")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS, help="Maximum rows returned.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Query time limit in seconds.")
+    parser.add_argument("--csv", action="store_true", help="Print the result as CSV.")
+    args = parser.parse_args()
+
+    df = data_store.load_dataset(args.source, args.store)
+    ensure_database(df, data_store.data_version(args.source, args.store), args.db)
+    if not args.sql:
+        print(schema(args.db).to_string(index=False))
+        return
+    try:
+        result, truncated = run_query(args.sql, args.db, args.max_rows, args.timeout)
+    except QueryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.csv:
+        result.to_csv(sys.stdout, index=False)
+    else:
+        print(result.to_string(index=False))
+    if truncated:
+        print(f"(first {args.max_rows} rows shown)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# synthetic_data.py
+
+"""
+Generate LongForm.csv-shaped programming data of any size for benchmarks.
+
+Cardinalities follow the real archive: two semesters per academic year going
+back decades, tens of concerts per semester with numbered program items
+(Index "concert.item"), a long-tailed (Zipf) repertoire of composers and
+pieces, a roster of performers that turns over, and the same composer category
+and status codes, including the odd invalid or missing value.
+
+    python synthetic_data.py 100000 -o synthetic_100k.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = [
+    "Semester", "Academic Year", "Concert #", "Performer", "Date", "Performer Type",
+    "Detailed Performance", "Performance Type", "Instrument", "Index", "Composer", "Ugly",
+    "Composer Category", "Composer Status", "Arranger", "Piece",
+]
+PERFORMANCE_TYPES = ["Recital", "Chamber", "Ensemble", "Opera", "Jazz"]
+PERFORMANCE_WEIGHTS = [0.45, 0.25, 0.2, 0.05, 0.05]
+PERFORMER_TYPES = ["Student Recital", "Faculty Recital", "Guest Artist", "Ensemble"]
+INSTRUMENTS = ["Piano", "Violin", "Viola", "Cello", "Double Bass", "Flute", "Oboe", "Clarinet",
+               "Bassoon", "Horn", "Trumpet", "Trombone", "Tuba", "Percussion", "Voice", "Guitar"]
+FIRST = ["Amy", "Johann", "Clara", "Florence", "Samuel", "Lili", "William", "Grażyna", "Eugène",
+         "Madeleine", "Ludwig", "Chen", "Jessie", "Antônio", "Rebecca", "Valerie", "Jean", "Missy"]
+LAST = ["Beach", "Bach", "Schumann", "Price", "Barber", "Boulanger", "Still", "Bacewicz", "Bozza",
+        "Dring", "Beethoven", "Yi", "Montgomery", "Jobim", "Clarke", "Coleman", "Sibelius", "Mazzoli"]
+MAX_SEMESTERS = 120
+FORMS = ["Sonata", "Suite", "Trio", "Quartet", "Nocturne", "Etude", "Fantasy", "Concerto",
+         "Prelude", "Variations", "Songs", "Dances"]
+
+
+def _zipf_choice(rng, n_items: int, size: int, a: float = 1.2) -> np.ndarray:
+    """
+    Draw item numbers 0..n_items-1 with a long-tailed (Zipf-like) popularity.
+    """
+    weights = 1.0 / np.arange(1, n_items + 1) ** a
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def _names(rng, n: int, salt: str):
+    """
+    n distinct (display, "Last, First") name pairs.
+    """
+    first = rng.choice(FIRST, n)
+    last = rng.choice(LAST, n)
+    suffix = np.char.add(salt, np.arange(n).astype(str))
+    display = np.char.add(np.char.add(np.char.add(first, " "), last), suffix)
+    ugly = np.char.add(np.char.add(np.char.add(last, suffix), ", "), first)
+    return display, ugly
+
+
+def generate(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A LongForm-shaped frame with `n_rows` performance records.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Concerts of ~8 items, ~60 per semester; past MAX_SEMESTERS (the archive's
+    # span) larger sizes get busier semesters instead of more of them
+    items_per_concert = 8
+    n_concerts = max(1, -(-n_rows // items_per_concert))
+    n_semesters = min(MAX_SEMESTERS, max(2, -(-n_concerts // 60)))
+    concerts_per_semester = -(-n_concerts // n_semesters)
+    last_year = 2025
+    sem_idx = np.arange(n_semesters)
+    # Newest first: Spring of last_year, Fall of last_year - 1, ...
+    season = np.where(sem_idx % 2 == 0, "Spring", "Fall")
+    start_year = last_year - (sem_idx + 1) // 2 - (season == "Spring")
+    cal_year = np.where(season == "Spring", start_year + 1, start_year)
+    semesters = np.char.add(np.char.add(season, " "), cal_year.astype(str))
+    ay = np.char.add(
+        np.char.add(np.char.add(np.char.zfill((start_year % 100).astype(str), 2), "-"),
+                    np.char.zfill(((start_year + 1) % 100).astype(str), 2)),
+        " Academic Year",
+    )
+
+    row = np.arange(n_rows)
+    concert_global = row // items_per_concert
+    item = row % items_per_concert + 1
+    sem_of_row = np.minimum(concert_global // concerts_per_semester, n_semesters - 1)
+    concert_no = concert_global % concerts_per_semester + 1
+
+    # Dates: spread over the semester's months
+    month = np.where(season[sem_of_row] == "Spring", 1 + concert_no % 5, 8 + concert_no % 5)
+    day = 1 + (concert_global * 7) % 28
+    year2 = cal_year[sem_of_row] % 100
+    dates = np.char.add(np.char.add(np.char.add(np.char.add(month.astype(str), "/"), day.astype(str)), "/"),
+                        np.char.zfill(year2.astype(str), 2))
+
+    # Repertoire: composers and pieces long-tailed; a piece belongs to one composer
+    n_composers = max(50, int(40 * n_rows ** 0.5))
+    n_pieces = max(100, int(3 * n_composers))
+    comp_display, comp_ugly = _names(rng, n_composers, "c")
+    piece_composer = _zipf_choice(rng, n_composers, n_pieces)
+    piece_year = rng.integers(1700, 2025, n_pieces)
+    piece_titles = np.char.add(
+        np.char.add(np.char.add(rng.choice(FORMS, n_pieces), " No. "), np.arange(1, n_pieces + 1).astype(str)),
+        np.char.add(np.char.add(" (", piece_year.astype(str)), ")"),
+    )
+    comp_category = rng.choice([1, 2, 3, 4, 999], n_composers, p=[0.55, 0.15, 0.18, 0.1, 0.02]).astype(float)
+    comp_category[rng.random(n_composers) < 0.02] = np.nan
+    comp_status = rng.choice([1, 2], n_composers, p=[0.4, 0.6]).astype(float)
+    comp_status[rng.random(n_composers) < 0.02] = np.nan
+
+    piece = _zipf_choice(rng, n_pieces, n_rows, a=1.05)
+    composer = piece_composer[piece]
+
+    # Performers: a roster that turns over every few semesters
+    n_performers = max(20, int(20 * n_rows ** 0.5))
+    perf_display, _ = _names(rng, n_performers, "p")
+    step = max(1, n_performers // n_semesters)
+    performer = (sem_of_row * step + rng.integers(0, 3 * step, n_rows)) % n_performers
+
+    concert_type = rng.choice(len(PERFORMANCE_TYPES), n_concerts, p=PERFORMANCE_WEIGHTS)
+    perf_type = np.array(PERFORMANCE_TYPES)[concert_type[concert_global]]
+
+    df = pd.DataFrame({
+        "Semester": semesters[sem_of_row],
+        "Academic Year": ay[sem_of_row],
+        "Concert #": concert_no,
+        "Performer": perf_display[performer],
+        "Date": dates,
+        "Performer Type": rng.choice(PERFORMER_TYPES, n_rows),
+        "Detailed Performance": perf_type,
+        "Performance Type": perf_type,
+        "Instrument": rng.choice(INSTRUMENTS, n_rows),
+        "Index": np.char.add(np.char.add(concert_no.astype(str), "."), item.astype(str)),
+        "Composer": comp_display[composer],
+        "Ugly": comp_ugly[composer],
+        "Composer Category": comp_category[composer],
+        "Composer Status": comp_status[composer],
+        "Arranger": np.where(rng.random(n_rows) < 0.05, "Arr. Staff", None),
+        "Piece": piece_titles[piece],
+    }, columns=COLUMNS)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic LongForm.csv-shaped data."
+    )
+    parser.add_argument("rows", type=int, help="Number of performance records.")
+    parser.add_argument("-o", "--output", default=None, help="Output CSV path (default synthetic_<rows>.csv).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    output = args.output or f"synthetic_{args.rows}.csv"
+    generate(args.rows, args.seed).to_csv(output, index=False)
+    print(f"Wrote {args.rows} rows to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+AI_detect.py against the local stub of the completions endpoint.
+"""
+import os
+import json
+import threading
+import urllib.request
+
+import pytest
+
+import AI_detect
+import detector_stub_server
+from api_scheduler import RequestScheduler
+
+
+@pytest.fixture
+def stub():
+    """
+    Start a stub server factory; every server started is shut down afterwards.
+    """
+    servers = []
+
+    def start(**kwargs):
+        server = detector_stub_server.make_server(port=0, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address[:2]
+        return server, f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def stub_stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/stats") as resp:
+        return json.load(resp)
+
+
+def make_files(tmp_path, n: int) -> list:
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"doc_{i:02d}.txt"
+        path.write_text(f"Program note number {i}.\n" * (i + 1), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_concurrent_results_keep_input_order_and_reuse_connections(stub, tmp_path):
+    workers = 4
+    server, url = stub(latency=0.02)
+    # Reverse order, so completion order differs from input order
+    paths = make_files(tmp_path, 16)[::-1]
+
+    results = AI_detect.analyze_files(paths, "test-key", workers=workers, api_url=f"{url}/v1/completions")
+
+    assert [r["file"] for r in results] == [os.path.basename(p) for p in paths]
+    assert all(r["verdict"] in ("likely AI-generated", "unlikely AI-generated") for r in results)
+    stats = stub_stats(url)
+    assert stats["requests"] == len(paths)
+    # Pooled keep-alive connections, plus the one that fetched /stats
+    assert stats["connections"] - 1 <= workers
+
+
+def test_throttled_and_failed_calls_are_retried(stub, tmp_path):
+    # More workers than the stub admits per second, and some 503s
+    server, url = stub(max_rps=4, error_rate=0.1)
+    paths = make_files(tmp_path, 8)
+    scheduler = RequestScheduler(max_concurrency=8, backoff_base=0.05)
+
+    results = AI_detect.analyze_files(paths, "test-key", workers=8, api_url=f"{url}/v1/completions",
+                                      scheduler=scheduler)
+
+    assert [r["file"] for r in results] == [os.path.basename(p) for p in paths]
+    stats = scheduler.stats()
+    assert stats["throttled"] > 0
+    assert stats["retries"] > 0
+    assert stub_stats(url)["throttled"] == stats["throttled"]
+
+
+def test_retry_after_is_honored_beyond_backoff_max():
+    scheduler = RequestScheduler(backoff_max=30.0)
+    assert scheduler.backoff(0, retry_after=60.0) == 60.0
+    assert scheduler.backoff(10) <= 30.0
+
+
+def test_existing_paths_with_glob_characters_are_used_as_given(tmp_path):
+    literal = tmp_path / "Slap My B[ass]oon.txt"
+    literal.write_text("text", encoding="utf-8")
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "a.md").write_text("text", encoding="utf-8")
+
+    paths = list(AI_detect.iter_inputs([str(literal), str(tmp_path / "notes" / "*.md")]))
+
+    assert paths == [str(literal), str(tmp_path / "notes" / "a.md")]
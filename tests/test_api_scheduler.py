@@ -0,0 +1,28 @@
+"""
+Adaptive concurrency of the request scheduler.
+"""
+import contextlib
+
+from api_scheduler import AdaptiveLimit
+
+
+def test_a_burst_of_concurrent_429s_halves_the_limit_once():
+    limit = AdaptiveLimit(16, 16)
+    with contextlib.ExitStack() as stack:
+        burst = [stack.enter_context(limit) for _ in range(8)]
+    for epoch in burst:
+        limit.throttled(epoch)
+    assert limit.limit == 8
+
+    # A call admitted after that decrease is a new congestion event
+    with limit as epoch:
+        pass
+    limit.throttled(epoch)
+    assert limit.limit == 4
+
+
+def test_successes_raise_the_limit_by_one_per_window():
+    limit = AdaptiveLimit(4, 16)
+    for _ in range(4):
+        limit.success()
+    assert limit.limit == 5
@@ -0,0 +1,99 @@
+"""
+Typed Parquet store: staleness, incremental refresh and canonical order.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+import identity
+import synthetic_data
+
+pytestmark = pytest.mark.skipif(not data_store.HAVE_ARROW, reason="pyarrow not installed")
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "LongForm.csv"
+    synthetic_data.generate(400, seed=1).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / "LongForm.parquet")
+
+
+def test_store_is_stale_when_an_older_export_is_restored(source, store):
+    data_store.load_dataset(source, store)
+    assert not data_store.is_stale(source, store)
+
+    # e.g. `cp -p` of an older export: the source is now older than the store
+    stat = os.stat(store)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 12))
+    version = data_store.data_version(source, store)
+    assert data_store.is_stale(source, store)
+
+    data_store.load_dataset(source, store)
+    assert not data_store.is_stale(source, store)
+    assert data_store.data_version(source, store) == version
+
+
+def test_incremental_refresh_equals_full_ingest(tmp_path, store):
+    raw = synthetic_data.generate(600, seed=2)
+    newest = raw["Semester"].iloc[0]
+    source = str(tmp_path / "LongForm.csv")
+    raw[raw["Semester"] != newest].to_csv(source, index=False)
+    data_store.ingest(source, store)
+    before = pd.read_parquet(store)
+
+    # A new semester, plus edits and a removal in semesters already stored
+    updated = raw.copy()
+    stored = updated.index[updated["Semester"] != newest]
+    updated.loc[stored[0], "Piece"] = "Sonata No. 9999 (2024)"
+    updated.loc[stored[1], "Composer Category"] = 4
+    updated.loc[stored[2], ["Composer", "Ugly"]] = ["Florence Price", "Price, Florence"]
+    updated = updated.drop(index=stored[3])
+    updated.to_csv(source, index=False)
+
+    refreshed, summary = data_store.refresh(source, store)
+    full = data_store.ingest(source, str(tmp_path / "full.parquet"))
+
+    assert summary["added"] == (raw["Semester"] == newest).sum()
+    assert summary["changed"] == 3
+    assert summary["removed"] == 1
+    id_columns = identity.ID_COLUMNS
+    pd.testing.assert_frame_equal(refreshed.drop(columns=id_columns), full.drop(columns=id_columns))
+    pd.testing.assert_frame_equal(pd.read_parquet(store), refreshed)
+
+    for col in id_columns:
+        # Ids number the same entities as a full ingest...
+        pairs = pd.DataFrame({"refreshed": refreshed[col], "full": full[col]}).drop_duplicates()
+        assert pairs["refreshed"].is_unique and pairs["full"].is_unique
+        assert ((pairs["refreshed"] < 0) == (pairs["full"] < 0)).all()
+        # ...and entities already stored keep their id
+        kept = pd.DataFrame({"key": identity.identity_keys(before, data_store.detect_columns(before.columns))[col],
+                             "id": before[col]}).dropna().drop_duplicates()
+        now = dict(zip(identity.identity_keys(refreshed, data_store.detect_columns(refreshed.columns))[col],
+                       refreshed[col]))
+        assert all(now.get(key, id_) == id_ for key, id_ in kept.itertuples(index=False, name=None))
+
+
+def test_canonical_order_is_year_then_fall_before_spring_then_numeric_index():
+    raw = pd.DataFrame({
+        "semester": ["Spring 2024", "Fall 2023", "Fall 2023", "Fall 2022", "Spring 2024", "Fall 2023"],
+        "academic year": ["23-24 Academic Year", "23-24 Academic Year", "23-24 Academic Year",
+                          "22-23 Academic Year", "23-24 Academic Year", "23-24 Academic Year"],
+        "index": ["2.1", "10.1", "9.2", "5.1", "1.3", "9.10"],
+        "date": ["2/1/24", "11/1/23", "10/20/23", "9/1/22", "1/20/24", "10/20/23"],
+    })
+
+    ordered = data_store.sort_canonical(data_store.apply_types(raw))
+
+    assert list(ordered["semester"].astype(str)) == [
+        "Fall 2022", "Fall 2023", "Fall 2023", "Fall 2023", "Spring 2024", "Spring 2024",
+    ]
+    # Index sorts as a number: 9.10 == 9.1 < 9.2 < 10.1, not "10.1" < "9.10" < "9.2"
+    assert list(ordered["index"]) == [5.1, 9.1, 9.2, 10.1, 1.3, 2.1]
+    assert list(ordered[data_store.SORT_RANK_COLUMN]) == list(range(6))
@@ -0,0 +1,38 @@
+"""
+Warm service mode: jobs and periodic cache pruning.
+"""
+import threading
+
+import pytest
+
+import detector_service
+import detector_stub_server
+from result_cache import ResultCache, TextCache
+
+
+@pytest.fixture
+def stub_url():
+    server = detector_stub_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/v1/completions"
+    server.shutdown()
+    server.server_close()
+
+
+def test_service_prunes_caches_while_running(stub_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(detector_service, "PRUNE_EVERY_JOBS", 2)
+    doc = tmp_path / "doc.txt"
+    doc.write_text("Program note.", encoding="utf-8")
+    cache_path = str(tmp_path / "cache.sqlite")
+    with ResultCache(cache_path) as cache, TextCache(cache_path) as text_cache:
+        # Entries expire as soon as they are written
+        service = detector_service.DetectorService("test-key", 2, stub_url, cache, text_cache, cache_max_age=0)
+        try:
+            first = service.analyze([str(doc)])
+            assert service.stats()["cache"]["evicted"] == 0
+            second = service.analyze([str(doc)])
+            assert second["analysis"] == first["analysis"]
+            assert service.stats()["cache"]["evicted"] == 2  # one result, one text
+        finally:
+            service.close()
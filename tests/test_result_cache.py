@@ -0,0 +1,67 @@
+"""
+ResultCache de-duplication of concurrent identical requests.
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ResultCache
+
+
+def test_duplicates_wait_for_the_request_in_flight(tmp_path):
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+        time.sleep(0.05)
+        return {"confidence": 42.0}
+
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.lookup("k", compute), range(32)))
+        assert results == [{"confidence": 42.0}] * 32
+        assert len(calls) == 1
+        assert cache.stats() == {"hits": 31, "misses": 1}
+        assert cache._pending == {}
+
+
+def test_duplicate_reading_before_the_owner_stores_does_not_recompute(tmp_path):
+    # B misses the cache, then A stores its result and stops being pending
+    # before B checks for a request in flight
+    calls = []
+    computing, release, b_read, a_done = (threading.Event() for _ in range(4))
+
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        real_get = cache.get
+
+        def get(key):
+            result = real_get(key)
+            if threading.current_thread().name == "B":
+                b_read.set()
+                assert a_done.wait(5)
+            return result
+
+        cache.get = get
+
+        def compute(name):
+            calls.append(name)
+            if name == "A":
+                computing.set()
+                assert release.wait(5)
+            return {"confidence": 1.0}
+
+        a = threading.Thread(target=cache.lookup, args=("k", lambda: compute("A")), name="A")
+        b = threading.Thread(target=cache.lookup, args=("k", lambda: compute("B")), name="B")
+        a.start()
+        assert computing.wait(5)
+        b.start()
+        assert b_read.wait(5)
+        release.set()
+        a.join(5)
+        a_done.set()
+        b.join(5)
+
+        assert calls == ["A"]
+        assert cache.stats() == {"hits": 1, "misses": 1}
@@ -0,0 +1,51 @@
+"""
+Read-only ad-hoc queries: allowed SELECTs, rejected writes and the time limit.
+"""
+import pytest
+
+import data_store
+import sql_backend
+import synthetic_data
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("sql")
+    source = directory / "LongForm.csv"
+    synthetic_data.generate(500, seed=4).to_csv(source, index=False)
+    df = data_store.ingest(str(source), str(directory / "LongForm.parquet"))
+    return sql_backend.ensure_database(df, "test", str(directory / "LongForm.sqlite"))
+
+
+def test_select_runs_with_row_limit(db):
+    result, truncated = sql_backend.run_query("SELECT perf_type, COUNT(*) AS n FROM performances GROUP BY 1", db)
+    assert result["n"].sum() == 500
+    assert not truncated
+
+    result, truncated = sql_backend.run_query("SELECT * FROM performances", db, max_rows=10)
+    assert len(result) == 10
+    assert truncated
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM performances",
+    "INSERT INTO performances (semester) VALUES ('x')",
+    "UPDATE performances SET piece = 'x'",
+    "DROP TABLE performances",
+    "CREATE TEMP TABLE t AS SELECT 1",
+    "ATTACH DATABASE ':memory:' AS other",
+    "PRAGMA query_only = OFF",
+    "SELECT 1; DELETE FROM performances",
+])
+def test_writes_and_attach_are_rejected(db, sql):
+    with pytest.raises(sql_backend.QueryError):
+        sql_backend.run_query(sql, db)
+    result, _ = sql_backend.run_query("SELECT COUNT(*) AS n FROM performances", db)
+    assert result["n"][0] == 500
+
+
+def test_long_queries_stop_at_the_time_limit(db):
+    endless = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+               "SELECT MAX(i) FROM n")
+    with pytest.raises(sql_backend.QueryError, match="time limit"):
+        sql_backend.run_query(endless, db, timeout=0.2)
@@ -0,0 +1,47 @@
+"""
+Text extraction and the extracted-text cache.
+"""
+import os
+
+import pytest
+
+import text_extraction
+from result_cache import TextCache
+
+
+def test_extracted_text_is_cached_until_the_file_changes(tmp_path):
+    doc = tmp_path / "notes.md"
+    doc.write_text("# Program notes\nFirst line.\nSecond line.\n", encoding="utf-8")
+    with TextCache(str(tmp_path / "cache.sqlite")) as cache:
+        text = text_extraction.extract_text(str(doc), cache)
+        assert text == "".join(text_extraction.iter_text(str(doc))) == doc.read_text(encoding="utf-8")
+        assert text_extraction.extract_text(str(doc), cache) == text
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+        doc.write_text("Rewritten, and longer than before.\n", encoding="utf-8")
+        assert text_extraction.extract_text(str(doc), cache) == "Rewritten, and longer than before.\n"
+        assert cache.stats() == {"hits": 1, "misses": 2}
+
+
+def test_set_workers_applies_after_the_pool_exists(tmp_path):
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    writer = PyPDF2.PdfWriter()
+    for _ in range(text_extraction.PARALLEL_MIN_PAGES * 2):
+        writer.add_blank_page(width=200, height=200)
+    pdf = tmp_path / "blank.pdf"
+    with open(pdf, "wb") as f:
+        writer.write(f)
+    n_pages = text_extraction.PARALLEL_MIN_PAGES * 2
+
+    try:
+        text_extraction.set_workers(2)
+        assert len(list(text_extraction.iter_text(str(pdf)))) == n_pages
+        assert text_extraction._pool is not None
+
+        # Serial from now on: the pool is released and not recreated
+        text_extraction.set_workers(1)
+        assert text_extraction._pool is None
+        assert len(list(text_extraction.iter_text(str(pdf)))) == n_pages
+        assert text_extraction._pool is None
+    finally:
+        text_extraction.set_workers(os.cpu_count() or 1)
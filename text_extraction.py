@@ -0,0 +1,205 @@
+"""
+Streaming text extraction for AI_detect.py.
+
+iter_text() yields a document's text piece by piece (PDF pages, DOCX
+paragraphs, text file lines), so parsing never holds more than the pieces in
+flight on top of what the consumer keeps:
+
+- PDFs with many pages are split into page ranges extracted in parallel by a
+  shared process pool; ranges are yielded in page order, with a bounded
+  number of ranges in flight.
+- DOCX files are read by streaming word/document.xml from the archive rather
+  than loading the whole document tree; the text matches python-docx's
+  paragraph text (body paragraphs, tabs, line breaks, hyperlinks).
+
+The detector scores a document's whole text (or windows over it), so
+extract_text() joins the pieces: its peak memory is about twice the text
+while the joined string is built. With a TextCache, that joined text is also
+what gets cached, by file path, modification time and size, so an unchanged
+file is never parsed twice.
+
+PyPDF2 is imported the first time a PDF is read, so other formats never pay
+for it.
+"""
+import os
+import atexit
+import zipfile
+import multiprocessing
+import threading
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+# PDFs with at least this many pages are extracted in parallel, in tasks of
+# MIN..MAX_PAGES_PER_TASK pages (each task re-opens the file, so tasks are
+# made as large as possible while still giving every worker some)
+PARALLEL_MIN_PAGES = 32
+MIN_PAGES_PER_TASK = 16
+MAX_PAGES_PER_TASK = 64
+# Largest text stored in the extraction cache (characters)
+MAX_CACHED_CHARS = 8 * 1024 * 1024
+PLAIN_EXTENSIONS = (".md", ".markdown", ".txt")
+SUPPORTED_EXTENSIONS = (".pdf", ".docx") + PLAIN_EXTENSIONS
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _P, _R, _HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+_pool = None
+_pool_size = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def set_workers(workers: int):
+    """
+    Number of processes used for parallel PDF extraction (default: CPU count).
+    A pool of another size is shut down (after its queued work) and replaced
+    on next use; with 1, PDFs are extracted serially in the calling thread.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        _pool_workers = max(1, workers)
+        if _pool is not None and _pool_size != _pool_workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _extraction_pool():
+    """
+    The shared process pool and its size, created on first use.
+    """
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None:
+            _pool_size = _pool_workers or os.cpu_count() or 1
+            # Spawned, not forked: the pool is created from a worker thread
+            # while other threads may hold locks (caches, HTTP pool, imports)
+            # that a forked child would inherit locked
+            _pool = ProcessPoolExecutor(max_workers=_pool_size, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown)
+        return _pool, _pool_size
+
+
+def _pypdf2():
+    try:
+        import PyPDF2
+    except ImportError:
+        raise ImportError("'PyPDF2' library not installed. Install with 'pip install PyPDF2'.") from None
+    return PyPDF2
+
+
+def preload():
+    """
+    Import the format libraries now rather than on first use (for a
+    long-running process); missing ones are left to fail on use.
+    """
+    try:
+        _pypdf2()
+    except ImportError:
+        pass
+
+
+def _pdf_pages(path: str, start: int, stop: int) -> list:
+    """
+    Text of pages start..stop-1 of a PDF (run in a pool worker).
+    """
+    with open(path, "rb") as f:
+        reader = _pypdf2().PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _iter_pdf(path: str):
+    workers = _pool_workers or os.cpu_count() or 1
+    with open(path, "rb") as f:
+        reader = _pypdf2().PdfReader(f)
+        n_pages = len(reader.pages)
+        if n_pages < PARALLEL_MIN_PAGES or workers == 1:
+            for page in reader.pages:
+                yield page.extract_text() or ""
+            return
+
+    pool, pool_size = _extraction_pool()
+    per_task = min(MAX_PAGES_PER_TASK, max(MIN_PAGES_PER_TASK, -(-n_pages // (2 * pool_size))))
+    ranges = deque((start, min(start + per_task, n_pages)) for start in range(0, n_pages, per_task))
+    # Keep a couple of ranges per worker in flight, yielding in page order
+    max_in_flight = 2 * pool_size
+    in_flight = deque()
+    while ranges or in_flight:
+        while ranges and len(in_flight) < max_in_flight:
+            in_flight.append(pool.submit(_pdf_pages, path, *ranges.popleft()))
+        yield from in_flight.popleft().result()
+
+
+def _iter_docx(path: str):
+    """
+    Text of each body paragraph, streamed from word/document.xml.
+    """
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        stack, parts = [], []
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem.tag)
+                continue
+            stack.pop()
+            parent = stack[-3:]
+            # Run content of a body paragraph, directly or inside a hyperlink
+            in_body_run = parent == [_BODY, _P, _R] or stack[-4:] == [_BODY, _P, _HYPERLINK, _R]
+            if in_body_run:
+                if elem.tag == _W + "t":
+                    parts.append(elem.text or "")
+                elif elem.tag == _W + "br":
+                    if elem.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif elem.tag in _RUN_TEXT:
+                    parts.append(_RUN_TEXT[elem.tag])
+            elif stack and stack[-1] == _BODY:
+                # A body-level element ended: emit paragraphs and free its subtree
+                if elem.tag == _P:
+                    yield "".join(parts)
+                parts = []
+                elem.clear()
+
+
+def _iter_plain(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from f
+
+
+def _iter_source(path: str, ext: str):
+    if ext == ".pdf":
+        return _iter_pdf(path), "\n"
+    if ext == ".docx":
+        return _iter_docx(path), "\n"
+    if ext in PLAIN_EXTENSIONS:
+        return _iter_plain(path), ""
+    raise ValueError(f"Unsupported file type: {ext}")
+
+
+def iter_text(path: str):
+    """
+    Yield the text of a PDF, DOCX, MD or TXT file in pieces; joined they
+    equal extract_text(path).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    pieces, separator = _iter_source(path, ext)
+    for i, piece in enumerate(pieces):
+        yield separator + piece if i and separator else piece
+
+
+def extract_text(path: str, cache=None) -> str:
+    """
+    Extract text from PDF, DOCX, MD, or TXT files. Uses and fills `cache`
+    (a TextCache) if given.
+    """
+    if cache is not None:
+        # Taken before reading, so a file changed meanwhile is not cached as unchanged
+        st = os.stat(path)
+        cached = cache.get(path)
+        if cached is not None:
+            return cached
+    text = "".join(iter_text(path))
+    if cache is not None and len(text) <= MAX_CACHED_CHARS:
+        cache.put(path, text, st)
+    return text